@@ -1,11 +1,15 @@
 import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 import sqlalchemy
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from redis import Redis
 from celery import Celery
+from kombu import Queue
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -13,10 +17,17 @@ from typing import AsyncGenerator, Generator
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from fastapi import Request, Response
+
+from metrics import DB_POOL_ACQUIRE_DURATION
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Determine environment
 env = os.getenv('ENV', 'dev').lower()
 
@@ -27,13 +38,40 @@ POSTGRES_DB = os.getenv("POSTGRES_DB")
 POSTGRES_USER = os.getenv("POSTGRES_USER")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD")
 
+# Read replica Configuration (each setting falls back to the primary; unset = reads go to the primary)
+POSTGRES_READ_HOST = os.getenv("POSTGRES_READ_HOST") or POSTGRES_HOST
+POSTGRES_READ_PORT = os.getenv("POSTGRES_READ_PORT") or POSTGRES_PORT
+POSTGRES_READ_DB = os.getenv("POSTGRES_READ_DB") or POSTGRES_DB
+POSTGRES_READ_USER = os.getenv("POSTGRES_READ_USER") or POSTGRES_USER
+POSTGRES_READ_PASSWORD = os.getenv("POSTGRES_READ_PASSWORD") or POSTGRES_PASSWORD
+
+# Read-your-writes: after a write (or a finished write task) the client reads from the primary for this many seconds.
+# Responses carry the deadline in this header; the client echoes it on later requests (works cross-origin, unlike a cookie)
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", 10))
+READ_YOUR_WRITES_HEADER = "X-DB-Primary-Until"
+
 # Redis Configuration
 REDIS_HOST = os.getenv("REDIS_HOST_LOCAL") if env == "dev" else os.getenv("REDIS_HOST_REMOTE")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))  # Default Redis DB
+CELERY_RESULT_DB = int(os.getenv("CELERY_RESULT_DB", REDIS_DB + 1))  # Task results kept apart from the broker
 
 DATABASE_URL_ASYNC = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"  
 DATABASE_URL_SYNC = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+DATABASE_URL_READ_ASYNC = f"postgresql+asyncpg://{POSTGRES_READ_USER}:{POSTGRES_READ_PASSWORD}@{POSTGRES_READ_HOST}:{POSTGRES_READ_PORT}/{POSTGRES_READ_DB}"
+READ_REPLICA_ENABLED = DATABASE_URL_READ_ASYNC != DATABASE_URL_ASYNC
+
+# engine_async pool settings (also used for the read engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes")
+# Connections opened at startup (capped at DB_POOL_SIZE) so the first requests skip connection setup
+DB_POOL_WARM_CONNECTIONS = int(os.getenv("DB_POOL_WARM_CONNECTIONS", 5))
+DB_POOL_WARM_TIMEOUT = float(os.getenv("DB_POOL_WARM_TIMEOUT", 10))  # Startup never waits longer than this
+# asyncpg prepared statements cached per connection (0 disables, e.g. behind PgBouncer in transaction mode)
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 500))
 
 
 # SQLAlchemy Configuration
@@ -46,15 +84,35 @@ engine_sync = create_engine(
 )
 
 
-engine_async: AsyncEngine = create_async_engine(
-    DATABASE_URL_ASYNC,
-    pool_size=20,        # Adjusted pool size
-    max_overflow=10,     # Adjusted overflow
-    pool_timeout=30,     # Reduced timeout
-    pool_recycle=1800,   # Recycle connections every 30 minutes
-    echo=True,           # Set to False in production
-    future=True
-)
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Records how long each checkout waits for a pooled connection.
+    Pool events only fire once a connection has been handed out, so the wait is timed around the pool's own get.
+    """
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_ACQUIRE_DURATION.observe(time.perf_counter() - start)
+
+
+def _create_async_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        poolclass=TimedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+        echo=True,           # Set to False in production
+        future=True
+    )
+
+
+engine_async: AsyncEngine = _create_async_engine(DATABASE_URL_ASYNC)
 
 SessionLocal = sessionmaker(
     bind=engine_async,
@@ -70,13 +128,52 @@ SessionLocalSync = sessionmaker(
     autocommit=False,
 )
 
+# Read engine: a separate pool on the replica, or the primary engine when no replica is configured
+if READ_REPLICA_ENABLED:
+    engine_async_read: AsyncEngine = _create_async_engine(DATABASE_URL_READ_ASYNC)
+else:
+    engine_async_read = engine_async
+
+SessionLocalRead = sessionmaker(
+    bind=engine_async_read,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False
+)
+
 # Celery Configuration
 celery_app = Celery(
     "tasks",
     broker=f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}",
-    backend=f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+    backend=f"redis://{REDIS_HOST}:{REDIS_PORT}/{CELERY_RESULT_DB}"
 )
 
+# Celery queue topology: each queue gets its own worker (see worker.py)
+#   interactive: short user-facing writes (register, teams, events)
+#   media:       micro-batched check-in writes
+#   scoring:     score recomputation and persistence
+#   bulk:        bulk imports and reporting
+CELERY_QUEUES = {
+    "interactive": {"concurrency": 8, "prefetch_multiplier": 4, "acks_late": False},
+    # Check-in inserts are not idempotent (a redelivery would insert and count them twice), so ack early
+    "media": {"concurrency": 4, "prefetch_multiplier": 1, "acks_late": False},
+    "scoring": {"concurrency": 4, "prefetch_multiplier": 1, "acks_late": True},
+    "bulk": {"concurrency": 2, "prefetch_multiplier": 1, "acks_late": True},
+}
+
+CELERY_TASK_QUEUES = {
+    "tasks.register_user_task": "interactive",
+    "tasks.create_team_task": "interactive",
+    "tasks.join_team_task": "interactive",
+    "tasks.create_event_task": "interactive",
+    "tasks.create_checkin_batch_task": "media",
+    "tasks.calculate_team_score_task": "scoring",
+    "tasks.persist_team_scores_task": "scoring",
+    "tasks.flush_pending_scores_task": "scoring",
+    "tasks.bulk_join_teams_task": "bulk",
+}
+
 # Celery optional configuration
 celery_app.conf.update(
     result_expires=3600,  
@@ -85,6 +182,23 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_queues=[Queue(name) for name in CELERY_QUEUES],
+    task_default_queue="interactive",
+    task_routes={task: {"queue": queue} for task, queue in CELERY_TASK_QUEUES.items()},
+    # acks_late tasks are redelivered if a worker dies mid-task; they must be safe to re-run
+    task_annotations={
+        task: {"acks_late": True, "reject_on_worker_lost": True}
+        for task, queue in CELERY_TASK_QUEUES.items()
+        if CELERY_QUEUES[queue]["acks_late"]
+    },
+    broker_transport_options={"visibility_timeout": 3600},
+    # Write-behind score flusher interval (needs a beat process: celery -A tasks beat)
+    beat_schedule={
+        "flush-pending-scores": {
+            "task": "tasks.flush_pending_scores_task",
+            "schedule": float(os.getenv("SCORE_FLUSH_INTERVAL", 5)),
+        },
+    },
 )
 celery_app.autodiscover_tasks(['tasks'])
 
@@ -93,42 +207,134 @@ async def get_postgresql_connection() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
 
-# Synchronous dependency for Celery
-def get_synchronous_session() -> Generator[Session, None, None]:
-    session = SessionLocalSync()
+def wrote_recently(request: Request) -> bool:
+    """
+    True while the read-your-writes deadline the client echoed back has not passed.
+    Deadlines further out than READ_YOUR_WRITES_SECONDS are ignored, so clients cannot pin themselves to the primary.
+    """
+    try:
+        remaining = float(request.headers.get(READ_YOUR_WRITES_HEADER, 0)) - time.time()
+    except ValueError:
+        return False
+    return 0 < remaining <= READ_YOUR_WRITES_SECONDS
+
+def mark_write(response: Response):
+    """
+    Pin the client's reads to the primary for READ_YOUR_WRITES_SECONDS from now.
+    Set on write responses and again when a task status shows the write has finished.
+    """
+    if READ_REPLICA_ENABLED and READ_YOUR_WRITES_SECONDS > 0:
+        response.headers[READ_YOUR_WRITES_HEADER] = str(int(time.time()) + READ_YOUR_WRITES_SECONDS)
+
+def marks_write(response: Response):
+    """
+    Route dependency for endpoints that write data the client reads back: calls mark_write on the response.
+    Only applied when the route returns normally; error responses are built fresh and carry no header.
+    """
+    mark_write(response)
+
+@asynccontextmanager
+async def open_read_session(use_primary: bool = False):
+    """
+    Session for read-only queries: the replica, or the primary when use_primary is set,
+    no replica is configured or the replica cannot be reached.
+    """
+    if use_primary or not READ_REPLICA_ENABLED:
+        async with SessionLocal() as session:
+            yield session
+        return
+
+    session = SessionLocalRead()
     try:
+        try:
+            # Connect up front only here, so an unreachable replica falls back before any query runs
+            await session.connection()
+        except (DBAPIError, OSError) as e:
+            logger.warning(f"Read replica unavailable, reading from the primary: {e}")
+            await session.close()
+            session = SessionLocal()
         yield session
     finally:
-        session.close()
+        await session.close()
+
+# Asynchronous dependency for read-only routes
+async def get_postgresql_read_connection(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with open_read_session(wrote_recently(request)) as session:
+        yield session
+
+async def _warm_engine(engine: AsyncEngine, connections: int, statements: list) -> int:
+    async def open_connection():
+        connection = await engine.connect()
+        try:
+            # Run each hot statement once so it is prepared and cached on this connection
+            for statement, params in statements:
+                await connection.execute(statement, params)
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
 
-# Redis Connection
-def get_redis_connection():
+    # Hold all connections at once so the pool really opens `connections` distinct ones
+    results = await asyncio.gather(*(open_connection() for _ in range(connections)), return_exceptions=True)
+    opened = [result for result in results if not isinstance(result, BaseException)]
+    for connection in opened:
+        await connection.close()
+    for error in {str(result) for result in results if isinstance(result, BaseException)}:
+        logger.warning(f"Failed to warm a database connection: {error}")
+    return len(opened)
+
+async def warm_up_pools(statements: list = ()) -> dict:
     """
-    Initialize Redis connection based on environment.
+    Pre-open DB_POOL_WARM_CONNECTIONS connections on engine_async (and the read engine) and prepare
+    the given (statement, params) hot queries on each. Failures are logged, never raised.
     """
+    connections = min(DB_POOL_WARM_CONNECTIONS, DB_POOL_SIZE)
+    if connections <= 0:
+        return {}
+    engines = {"primary": engine_async}
+    if READ_REPLICA_ENABLED:
+        engines["read"] = engine_async_read
     try:
-        redis_conn = Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
-        redis_conn.ping()  # Test Redis connection
-        print(f"Connected to Redis at {REDIS_HOST}:{REDIS_PORT}, DB: {REDIS_DB}")
-        return redis_conn
-    except Exception as e:
-        print(f"Failed to connect to Redis: {e}")
-        raise
+        counts = await asyncio.wait_for(
+            asyncio.gather(*(_warm_engine(engine, connections, list(statements)) for engine in engines.values())),
+            DB_POOL_WARM_TIMEOUT,
+        )
+    except asyncio.TimeoutError:
+        logger.warning(f"Database pool warm-up did not finish within {DB_POOL_WARM_TIMEOUT}s")
+        return {}
+    return dict(zip(engines, counts))
+
+async def dispose_pools():
+    """
+    Close every pooled connection (called on shutdown after in-flight requests have finished).
+    """
+    await engine_async.dispose()
+    if READ_REPLICA_ENABLED:
+        await engine_async_read.dispose()
+
+# Synchronous dependency for Celery
+def get_synchronous_session() -> Generator[Session, None, None]:
+    session = SessionLocalSync()
+    try:
+        yield session
+    finally:
+        session.close()
 
 # Example: Test connections
 if __name__ == "__main__":
     # Test PostgreSQL Connection
     print(f"Environment: {env}")
     print(f"Connecting to PostgreSQL at {POSTGRES_HOST}:{POSTGRES_PORT}...")
-    try:
-        db = next(get_postgresql_connection())
-        print("PostgreSQL connection successful!")
-    except Exception as e:
-        print(f"PostgreSQL connection failed: {e}")
+    warmed = asyncio.run(warm_up_pools())
+    if warmed.get("primary"):
+        print(f"PostgreSQL connection successful! Warmed connections: {warmed}")
+    else:
+        print("PostgreSQL connection failed (see warnings above).")
 
-    # Test Redis Connection
+    # Test Redis Connection (pooled clients live in redis_client.py)
     try:
-        redis = get_redis_connection()
-        print("Redis connection successful!")
+        from redis_client import get_redis
+        get_redis().ping()
+        print(f"Connected to Redis at {REDIS_HOST}:{REDIS_PORT}, DB: {REDIS_DB}")
     except Exception as e:
         print(f"Redis connection failed: {e}")
\ No newline at end of file
@@ -1,17 +1,22 @@
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 import logging
 import uvicorn
 import os
+import time
+from contextlib import asynccontextmanager
 
 # custom
 from routes.main import router
 from routes.event import router as event_router
 
-from database import get_postgresql_connection
+from database import READ_YOUR_WRITES_HEADER, warm_up_pools, dispose_pools
+from services import password_hasher, idempotency, checkin_batcher, near_cache
+from redis_client import close_async_redis
+from metrics import HTTP_REQUEST_DURATION, render_metrics
 from models import *
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 origins = os.getenv("ORIGINS", "")
 origins_list = origins.split(",") if origins else []
@@ -29,11 +34,34 @@ logger = logging.getLogger(__name__)
 
 
 
+# 啟動時預熱的熱門查詢：每條預熱連線各執行一次，prepared statement 已在快取中
+WARM_UP_STATEMENTS = [
+    (near_cache.EVENT_SQL, {"event_id": 0}),
+    (near_cache.EVENT_TEAM_IDS_SQL, {"event_id": 0}),
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Warming up PostgreSQL connection pools...")
+    warmed = await warm_up_pools(WARM_UP_STATEMENTS)
+    logger.info(f"PostgreSQL connections warmed: {warmed}")
+    yield
+    # 進行中的請求結束後：送出尚未送出的打卡批次，再關閉密碼雜湊行程池、Redis 非同步連線池與資料庫連線池
+    await checkin_batcher.drain()
+    password_hasher.shutdown()
+    await close_async_redis()
+    await dispose_pools()
+
+
 # Initialize FastAPI application
 app = FastAPI(
     title="按讚活動",
     description="按讚拿獎金",
     version="1.0.0",
+    # orjson 編碼回應，比預設的 json 模組快
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -41,8 +69,38 @@ app.add_middleware(
     allow_origins=origins,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", READ_YOUR_WRITES_HEADER],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # 以路由樣板 (例如 /api/event/{event_id}) 作為標籤，避免標籤數量爆增
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            method=request.method,
+            route=route.path if route is not None else "unmatched",
+            status=status,
+        ).observe(time.perf_counter() - start)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+@app.exception_handler(idempotency.IdempotencyKeyError)
+async def idempotency_key_error_handler(request, exc):
+    return JSONResponse(
+        status_code=422,
+        content={"detail": str(exc)},
+    )
+
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
     return JSONResponse(
@@ -50,14 +108,6 @@ async def exception_handler(request, exc):
         content={"detail": str(exc)},
     )
 
-# Initialize PostgreSQL connection
-try:
-    logger.info("Connecting to PostgreSQL...")
-    postgres_conn = get_postgresql_connection()
-    logger.info("PostgreSQL connection established.")
-except Exception as e:
-    logger.error(f"Failed to connect to PostgreSQL: {e}")
-
 app.include_router(router)
 app.include_router(event_router)
 
@@ -0,0 +1,168 @@
+import os
+import time
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from celery.signals import task_prerun, task_postrun, task_retry, worker_init, worker_process_shutdown
+
+# 多行程模式 (uvicorn --workers / Celery prefork) 需設定 PROMETHEUS_MULTIPROC_DIR
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if MULTIPROC_DIR:
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+CELERY_METRICS_PORT = int(os.getenv("CELERY_METRICS_PORT", 9540))
+
+# ------------------ HTTP ------------------
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+
+# ------------------ Database ------------------
+
+DB_POOL_ACQUIRE_DURATION = Histogram(
+    "db_pool_acquire_duration_seconds",
+    "Time spent waiting for an engine_async connection",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+# ------------------ Cache ------------------
+
+TEAM_SCORE_CACHE_REQUESTS = Counter(
+    "team_score_cache_requests_total",
+    "team:{id}:score cache lookups",
+    ["result"],
+)
+
+# ------------------ Celery ------------------
+
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task runtime",
+    ["task", "state"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
+CELERY_TASK_RETRIES = Counter(
+    "celery_task_retries_total",
+    "Celery task retries",
+    ["task"],
+)
+
+_task_started_at = {}
+
+
+@task_prerun.connect
+def _record_task_start(task_id=None, **kwargs):
+    _task_started_at[task_id] = time.perf_counter()
+
+
+@task_postrun.connect
+def _record_task_runtime(task_id=None, task=None, state=None, **kwargs):
+    started_at = _task_started_at.pop(task_id, None)
+    if started_at is not None and task is not None:
+        CELERY_TASK_DURATION.labels(task=task.name, state=state or "UNKNOWN").observe(time.perf_counter() - started_at)
+
+
+@task_retry.connect
+def _record_task_retry(sender=None, **kwargs):
+    CELERY_TASK_RETRIES.labels(task=getattr(sender, "name", "unknown")).inc()
+
+
+@worker_init.connect
+def _start_worker_metrics_server(**kwargs):
+    """
+    Worker 主行程開啟 /metrics (預設埠 9540)，多行程模式下彙整所有子行程的指標
+    """
+    if MULTIPROC_DIR:
+        # 子行程尚未 fork，清掉上次執行留下的指標檔
+        for name in os.listdir(MULTIPROC_DIR):
+            if name.endswith(".db"):
+                os.remove(os.path.join(MULTIPROC_DIR, name))
+    start_http_server(CELERY_METRICS_PORT, registry=_scrape_registry(include_api_collectors=False))
+
+
+@worker_process_shutdown.connect
+def _mark_worker_process_dead(pid=None, **kwargs):
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid or os.getpid())
+
+
+# ------------------ Scrape-time collectors (API) ------------------
+
+class DatabasePoolCollector:
+    """
+    engine_async 連線池狀態 (抓取時讀取)
+    """
+
+    def collect(self):
+        from database import engine_async
+        pool = engine_async.pool
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "engine_async connections in use")
+        checked_out.add_metric([], pool.checkedout())
+        yield checked_out
+        overflow = GaugeMetricFamily("db_pool_overflow", "engine_async connections above pool_size")
+        overflow.add_metric([], max(pool.overflow(), 0))
+        yield overflow
+        size = GaugeMetricFamily("db_pool_size", "engine_async configured pool_size")
+        size.add_metric([], pool.size())
+        yield size
+
+
+class CeleryBacklogCollector:
+    """
+    每個 Celery queue 在 Redis broker 中等待的訊息數 (LLEN)
+    """
+
+    def collect(self):
+        from database import celery_app
+        from redis_client import get_redis
+
+        queues = [queue.name for queue in (celery_app.conf.task_queues or [])] or [celery_app.conf.task_default_queue]
+        backlog = GaugeMetricFamily("celery_queue_length", "Messages waiting in the broker", labels=["queue"])
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for queue in queues:
+                pipe.llen(queue)
+            for queue, length in zip(queues, pipe.execute()):
+                backlog.add_metric([queue], length)
+        except Exception:
+            pass
+        yield backlog
+
+
+_api_collectors = [DatabasePoolCollector(), CeleryBacklogCollector()]
+_api_collectors_registered = False
+
+
+def _scrape_registry(include_api_collectors: bool = True):
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        if include_api_collectors:
+            for collector in _api_collectors:
+                registry.register(collector)
+        return registry
+
+    global _api_collectors_registered
+    if include_api_collectors and not _api_collectors_registered:
+        for collector in _api_collectors:
+            REGISTRY.register(collector)
+        _api_collectors_registered = True
+    return REGISTRY
+
+
+def render_metrics():
+    """
+    回傳 (內容, content type) 供 /metrics 路由使用
+    """
+    return generate_latest(_scrape_registry()), CONTENT_TYPE_LATEST
@@ -1,6 +1,6 @@
 from sqlalchemy import Column, Integer, String, DateTime
 from database import Base
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -15,4 +15,9 @@ class Event(Base):
     created_at = Column(TIMESTAMP, nullable=False)
     
     # 一个活动对应多个队伍
-    teams = relationship('Team', back_populates='event', cascade="all, delete-orphan")
\ No newline at end of file
+    teams = relationship('Team', back_populates='event', cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # 活動列表的 keyset 分頁 (created_at DESC, id DESC)
+        Index("ix_events_created_at_id", created_at.desc(), id.desc()),
+    )
\ No newline at end of file
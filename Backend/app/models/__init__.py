@@ -2,9 +2,10 @@ from .user import User
 from .team import Team
 from .checkin import Checkin
 from .score import Score
+from .team_stats import TeamStats
 from .ranking import Ranking
 from .association import user_teams
 from .Event import Event
 
 # Specify what is accessible when using `from app.models import *`
-__all__ = ["User", "Team", "Checkin", "Score", "Ranking", "user_teams", "Event"]
+__all__ = ["User", "Team", "Checkin", "Score", "TeamStats", "Ranking", "user_teams", "Event"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -10,7 +10,15 @@ class Checkin(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     team_id = Column(Integer, ForeignKey("teams.id"))
+    event_id = Column(Integer, ForeignKey("events.id"), nullable=False)
     content = Column(Text, nullable=False)
     photo_url = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     photo_url = Column(String, nullable=True) 
+
+    __table_args__ = (
+        # 活動上傳列表的 keyset 分頁 (event_id, created_at DESC, id DESC)
+        Index("ix_checkins_event_id_created_at_id", event_id, created_at.desc(), id.desc()),
+        # 加入隊伍時依使用者調整各隊的打卡權重
+        Index("ix_checkins_user_id_team_id", user_id, team_id),
+    )
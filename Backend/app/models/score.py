@@ -8,8 +8,11 @@ class Score(Base):
     __tablename__ = "scores"
 
     id = Column(Integer, primary_key=True)
-    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
+    team_id = Column(Integer, ForeignKey("teams.id"), nullable=False, unique=True)  # ON CONFLICT (team_id) 批次寫入
     score = Column(Float, nullable=False)
+    # 手動設定分數時與統計值算出分數的差值，重算時加回 (見 services/score_service.set_team_scores)
+    adjustment = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
     # 與 Team 的反向關聯
     team = relationship("Team", back_populates="scores")
\ No newline at end of file
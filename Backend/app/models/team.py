@@ -13,7 +13,7 @@ class Team(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(100), unique=True, nullable=False)
     description = Column(Text)
-    event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
+    event_id = Column(Integer, ForeignKey('events.id'), nullable=False, index=True)
     created_at = Column(TIMESTAMP, default=datetime.utcnow)
 
     # 與 Score 之間的一對一關聯
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, DateTime, ForeignKey, Sequence
+from database import Base
+
+
+class TeamStats(Base):
+    """
+    每隊計分統計值，與打卡 / 加入隊伍在同一個交易中增量更新 (見 services/team_stats.py)
+    """
+    __tablename__ = "team_stats"
+
+    team_id = Column(Integer, ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+    checkin_count = Column(Integer, nullable=False, default=0)
+    # 每筆打卡 1 / 打卡者所屬隊伍數 的總和
+    total_weight = Column(Float, nullable=False, default=0.0)
+    first_checkin_at = Column(DateTime)
+    last_checkin_at = Column(DateTime)
+    # 註冊時間晚於第一次打卡的成員數
+    new_members = Column(Integer, nullable=False, default=0)
+    # 每次更新都從 team_stats_version_seq 取新值，計分時用來丟棄較舊的計算結果
+    version = Column(BigInteger, Sequence("team_stats_version_seq"), nullable=False)
@@ -0,0 +1,37 @@
+"""
+Recompute team_stats from the raw checkins / user_teams rows.
+
+    python rebuild_team_stats.py           # report drift, then rebuild
+    python rebuild_team_stats.py --check   # report drift only (exit code 1 if any)
+"""
+import sys
+import argparse
+
+from database import SessionLocalSync
+from services import team_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="only report drifted teams, do not rebuild")
+    parser.add_argument("--tolerance", type=float, default=1e-6, help="allowed total_weight difference")
+    args = parser.parse_args()
+
+    db = SessionLocalSync()
+    try:
+        drift = team_stats.find_drift(db, args.tolerance)
+        for row in drift:
+            print(row)
+        print(f"{len(drift)} team(s) drifted from checkins / user_teams")
+
+        if args.check:
+            sys.exit(1 if drift else 0)
+
+        count = team_stats.rebuild(db)
+        print(f"Rebuilt team_stats for {count} team(s)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import os
+import time
+import threading
+from redis import Redis, BlockingConnectionPool
+from redis import asyncio as aioredis
+
+from database import REDIS_HOST, REDIS_PORT, REDIS_DB
+
+# 連線池設定：每個行程最多的連線數與等待可用連線的秒數
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
+# 任務完成通知 (長輪詢 / SSE) 的訂閱各占一條連線，使用獨立且有上限的連線池，不會耗盡一般指令的連線
+REDIS_PUBSUB_MAX_CONNECTIONS = int(os.getenv("REDIS_PUBSUB_MAX_CONNECTIONS", 100))
+
+
+class _PoolStats:
+    """
+    連線池使用統計 (使用中 / 累計取得次數 / 等待時間)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.acquired = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_acquire(self, wait: float):
+        with self._lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def record_release(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self, created: int, max_connections: int) -> dict:
+        with self._lock:
+            return {
+                "in_use": self.in_use,
+                "created": created,
+                "max_connections": max_connections,
+                "acquired": self.acquired,
+                "wait_seconds_total": round(self.wait_seconds_total, 6),
+                "wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    同步呼叫端使用的連線池 (Celery worker、sync 路由)，連線用完時等待而非無限建立
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = _PoolStats()
+
+    def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        connection = super().get_connection(command_name, *keys, **options)
+        self.stats.record_acquire(time.perf_counter() - start)
+        return connection
+
+    def release(self, connection):
+        super().release(connection)
+        self.stats.record_release()
+
+
+class InstrumentedAsyncConnectionPool(aioredis.BlockingConnectionPool):
+    """
+    非同步路由使用的連線池 (redis.asyncio)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = _PoolStats()
+
+    async def get_connection(self, command_name, *keys, **options):
+        start = time.perf_counter()
+        connection = await super().get_connection(command_name, *keys, **options)
+        self.stats.record_acquire(time.perf_counter() - start)
+        return connection
+
+    async def release(self, connection):
+        await super().release(connection)
+        self.stats.record_release()
+
+
+_pool = None
+_async_pool = None
+_pubsub_pool = None
+_redis = None
+_async_redis = None
+_pubsub_redis = None
+_lock = threading.Lock()
+
+
+def get_redis() -> Redis:
+    """
+    回傳共用連線池的同步 Redis client (每個行程一份)
+    """
+    global _pool, _redis
+    if _redis is None:
+        with _lock:
+            if _redis is None:
+                _pool = InstrumentedConnectionPool(
+                    host=REDIS_HOST,
+                    port=REDIS_PORT,
+                    db=REDIS_DB,
+                    decode_responses=True,
+                    max_connections=REDIS_MAX_CONNECTIONS,
+                    timeout=REDIS_POOL_TIMEOUT,
+                )
+                _redis = Redis(connection_pool=_pool)
+    return _redis
+
+
+def get_async_redis() -> aioredis.Redis:
+    """
+    回傳共用連線池的 redis.asyncio client
+    """
+    global _async_pool, _async_redis
+    if _async_redis is None:
+        _async_pool = InstrumentedAsyncConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            decode_responses=True,
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+        )
+        _async_redis = aioredis.Redis(connection_pool=_async_pool)
+    return _async_redis
+
+
+def get_async_pubsub_redis() -> aioredis.Redis:
+    """
+    回傳訂閱專用連線池的 redis.asyncio client (上限 REDIS_PUBSUB_MAX_CONNECTIONS)
+    """
+    global _pubsub_pool, _pubsub_redis
+    if _pubsub_redis is None:
+        _pubsub_pool = InstrumentedAsyncConnectionPool(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            db=REDIS_DB,
+            decode_responses=True,
+            max_connections=REDIS_PUBSUB_MAX_CONNECTIONS,
+            timeout=REDIS_POOL_TIMEOUT,
+        )
+        _pubsub_redis = aioredis.Redis(connection_pool=_pubsub_pool)
+    return _pubsub_redis
+
+
+# ------------------ Pipelining Helpers ------------------
+
+def pipeline_execute(commands: list, transaction: bool = False) -> list:
+    """
+    以單一 round trip 執行多個指令，commands 為 (指令名稱, 參數...) 的 tuple 列表
+    例: pipeline_execute([("get", "a"), ("zscore", "board", 1)])
+    """
+    pipe = get_redis().pipeline(transaction=transaction)
+    for name, *args in commands:
+        getattr(pipe, name)(*args)
+    return pipe.execute()
+
+
+async def async_pipeline_execute(commands: list, transaction: bool = False) -> list:
+    """
+    pipeline_execute 的非同步版本
+    """
+    async with get_async_redis().pipeline(transaction=transaction) as pipe:
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return await pipe.execute()
+
+
+def get_many(keys: list) -> list:
+    """
+    多個 key 一次讀取 (MGET)
+    """
+    if not keys:
+        return []
+    return get_redis().mget(keys)
+
+
+async def async_get_many(keys: list) -> list:
+    if not keys:
+        return []
+    return await get_async_redis().mget(keys)
+
+
+# ------------------ Pool Stats ------------------
+
+def get_pool_stats() -> dict:
+    """
+    回傳同步與非同步連線池的使用統計
+    """
+    stats = {}
+    if _pool is not None:
+        stats["sync"] = _pool.stats.snapshot(len(_pool._connections), _pool.max_connections)
+    if _async_pool is not None:
+        stats["async"] = _async_pool.stats.snapshot(len(_async_pool._connections), _async_pool.max_connections)
+    if _pubsub_pool is not None:
+        stats["pubsub"] = _pubsub_pool.stats.snapshot(len(_pubsub_pool._connections), _pubsub_pool.max_connections)
+    return stats
+
+
+async def close_async_redis():
+    """
+    關閉非同步連線池 (應用程式結束時呼叫)
+    """
+    global _async_pool, _async_redis, _pubsub_pool, _pubsub_redis
+    if _async_redis is not None:
+        await _async_redis.close()
+        await _async_pool.disconnect()
+        _async_redis = None
+        _async_pool = None
+    if _pubsub_redis is not None:
+        await _pubsub_redis.close()
+        await _pubsub_pool.disconnect()
+        _pubsub_redis = None
+        _pubsub_pool = None
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 # User registration request
 
@@ -37,11 +37,15 @@ class UserCheckinRequest(BaseModel):
 # Update score request
 
 
-class UpdateScoreRequest(BaseModel):
+class TeamScore(BaseModel):
     team_id: int
     value: float
 
 
+class UpdateScoreRequest(BaseModel):
+    scores: List[TeamScore] = Field(..., min_items=1)
+
+
 class CreateEventRequest(BaseModel):
     name: str
     description: str
@@ -54,12 +58,10 @@ class JoinTeamRequest(BaseModel):
     team_id: int
 
 
-class UploadRequest(BaseModel):
-    user_id: int = Field(...,
-                         description="The ID of the user uploading the check-in data")
-    comment: Optional[str] = Field(
-        None, max_length=500, description="Optional comment, max length 500 characters")
-    photo: Optional[str] = Field(
-        None,
-        description="Base64 encoded image string, optional for photo uploads"
-    )
+class TeamMember(BaseModel):
+    user_id: int
+    team_id: int
+
+
+class BulkJoinTeamRequest(BaseModel):
+    members: List[TeamMember] = Field(..., min_items=1, max_items=10000)
@@ -1,33 +1,43 @@
 import os
+import json
+import time
+import uuid
 from datetime import datetime, timezone, timedelta
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Form, File, UploadFile, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.sql import text
-from database import get_postgresql_connection, get_redis_connection, celery_app
+from database import SessionLocal, get_postgresql_connection, get_postgresql_read_connection, open_read_session, wrote_recently, mark_write, marks_write, celery_app
+from redis_client import get_redis
+from metrics import TEAM_SCORE_CACHE_REQUESTS
 from models import Event, Team
 from models.association import user_teams
+from services import leaderboard, task_events, read_cache, pagination, near_cache, score_singleflight, idempotency, checkin_batcher, serialization, resource_version
+from services.serialization import RowJSONResponse, RawJSONResponse
+from services.storage import get_storage
 from sqlalchemy.sql import text
 from celery.result import AsyncResult
 from request.main import (
     CreateEventRequest,
-    UploadRequest,
     UserCheckinRequest,
     CreateTeamRequest,
     JoinTeamRequest,
+    BulkJoinTeamRequest,
     UpdateScoreRequest
 )
 from redis import Redis
+from redis.exceptions import RedisError
 from tasks import (
-    create_checkin_records_task, 
     create_team_task, 
     join_team_task, 
+    bulk_join_teams_task, 
     calculate_team_score_task, 
     persist_team_scores_task, 
     create_event_task, 
-    fetch_event_uploads_task, 
-    upload_checkin_data_task
 )
 
 # Define router
@@ -35,7 +45,7 @@ router = APIRouter()
 
 # Global settings
 utc_plus_8 = timezone(timedelta(hours=8))
-redis_conn: Redis = get_redis_connection()
+redis_conn: Redis = get_redis()
 
 
 # ------------------ Utility Functions ------------------
@@ -44,19 +54,19 @@ async def is_event_active(event_id: int, db: AsyncSession):
     """
     Check if the event is currently active (ongoing).
     """
-    result = await db.execute(text("SELECT * FROM events WHERE id = :id", {"id": event_id}))
-    event = result.fetchone()
+    event = await near_cache.get_event(event_id, db)
     if not event:
-        raise ValueError("Event not found")
-    current_time = datetime.now(timezone.utc)
-    return event.start_time <= current_time <= event.end_time
+        return False
+    # 活動時間以不含時區的 UTC 儲存
+    current_time = datetime.now(timezone.utc).replace(tzinfo=None)
+    return event["start_time"] <= current_time <= event["end_time"]
 
 
 # ------------------ Event Routes ------------------
 
 
-@router.post("/api/event/create", summary="Create Event", tags=["Event"])
-async def create_event(request: CreateEventRequest):
+@router.post("/api/event/create", summary="Create Event", tags=["Event"], dependencies=[Depends(marks_write)])
+async def create_event(request: CreateEventRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     Create a new event.
     """
@@ -68,203 +78,526 @@ async def create_event(request: CreateEventRequest):
     if request.start_time >= request.end_time:
         raise HTTPException(status_code=400, detail="Start time must be before end time")
 
+    task_kwargs = {
+        "name": request.name,
+        "description": request.description,
+        "start_time": request.start_time,
+        "end_time": request.end_time,
+    }
+    claimed = await idempotency.claim("event:create", idempotency_key, task_kwargs)
+    if claimed.replayed:
+        return {"message": "Event creation initiated.", "task_id": claimed.task_id, "replayed": True}
+
     # Submit Celery task
     try:
-        task = create_event_task.apply_async(
-            kwargs={
-                "name": request.name,
-                "description": request.description,
-                "start_time": request.start_time,
-                "end_time": request.end_time,
-            }
-        )
+        task = create_event_task.apply_async(kwargs=task_kwargs, task_id=claimed.task_id)
     except Exception as e:
+        await idempotency.release(claimed)
         raise HTTPException(status_code=500, detail=f"Failed to initiate event creation: {str(e)}")
 
     return {"message": "Event creation initiated.", "task_id": task.id}
 
-@router.post("/api/event/{event_id}/upload", summary="Upload Check-in Data", tags=["Event"])
-async def upload_checkin(event_id: int, request: UploadRequest, db: AsyncSession = Depends(get_postgresql_connection)):
+async def submit_checkin(claimed: idempotency.Claim, submission: dict) -> dict:
+    """
+    Queue a check-in on the API-side micro-batcher and wait for this request's own result.
+    The request id doubles as a task id for /api/event/status/{task_id}; if the batch does not
+    finish within CHECKIN_BATCH_TIMEOUT the request id is returned with status PENDING.
+    """
+    request_id = claimed.task_id or str(uuid.uuid4())
+    try:
+        result = await checkin_batcher.submit(dict(submission, request_id=request_id))
+    except Exception:
+        await idempotency.release(claimed)
+        raise
+
+    if result is None:
+        return {"task_id": request_id, "status": "PENDING"}
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return {"task_id": request_id, "status": "SUCCESS", "checkins": result["checkins"]}
+
+
+@router.post("/api/event/{event_id}/upload", summary="Upload Check-in Data", tags=["Event"], dependencies=[Depends(marks_write)])
+async def upload_checkin(
+    event_id: int,
+    user_id: int = Form(..., description="The ID of the user uploading the check-in data"),
+    comment: Optional[str] = Form(None, max_length=500, description="Optional comment, max length 500 characters"),
+    photo: Optional[UploadFile] = File(None, description="Optional photo file (multipart/form-data)"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """
     Upload check-in data for all teams a user belongs to in a specific event.
+    The photo is streamed to storage first; the check-ins are written through the micro-batcher.
+    A retried upload with the same Idempotency-Key is not stored or queued again.
     """
-    if not await is_event_active(event_id, db):
-        raise HTTPException(status_code=404, detail="Event is not active or does not exist.")
+    # The session is closed before the photo upload and the batch wait, so no pooled connection is held meanwhile
+    async with SessionLocal() as db:
+        if not await is_event_active(event_id, db):
+            raise HTTPException(status_code=404, detail="Event is not active or does not exist.")
+        team_ids = await near_cache.get_event_team_ids(event_id, db)
 
-    task = upload_checkin_data_task.apply_async(kwargs={
+    claimed = await idempotency.claim("event:upload", idempotency_key, {
         "event_id": event_id,
-        "user_id": request.user_id,
-        "comment": request.comment,
-        "photo": request.photo
+        "user_id": user_id,
+        "comment": comment,
+        "photo": photo.filename if photo is not None else None,
     })
+    if claimed.replayed:
+        if photo is not None:
+            await photo.close()
+        return {"message": "Check-in data upload initiated successfully.", "task_id": claimed.task_id, "replayed": True}
+
+    photo_url = None
+    if photo is not None and photo.filename:
+        try:
+            photo_url = await get_storage().save(photo)
+        except Exception as e:
+            await idempotency.release(claimed)
+            raise HTTPException(status_code=500, detail=f"Failed to store photo: {str(e)}")
+        finally:
+            await photo.close()
+
+    outcome = await submit_checkin(claimed, {
+        "event_id": event_id,
+        "user_id": user_id,
+        "team_ids": team_ids,
+        "comment": comment,
+        "photo_url": photo_url
+    })
+    return {"message": "Check-in data upload initiated successfully.", **outcome}
 
-    return {"message": "Check-in data upload initiated successfully.", "task_id": task.id}
-
-@router.get("/api/event/{event_id}/upload/list", summary="Get All Uploads for Event", tags=["Event"])
-async def get_event_uploads(event_id: int, db: AsyncSession = Depends(get_postgresql_connection)):
+def _keyset_params(cursor: Optional[str], limit: int) -> dict:
     """
-    Retrieve all uploads (photos and comments) for a specific event.
+    Build bind parameters for a (created_at, id) keyset query; fetches one extra row to detect the next page.
     """
-    task = fetch_event_uploads_task.apply_async(kwargs={"event_id": event_id})
-    return {"message": "Fetching uploads initiated.", "task_id": task.id}
+    params = {"limit": limit + 1}
+    if cursor:
+        try:
+            params["cursor_created_at"], params["cursor_id"] = pagination.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return params
 
 
-@router.get("/api/event/all", summary="Get All Events", tags=["Event"])
-async def get_events(db: AsyncSession = Depends(get_postgresql_connection)):
-    """
-    Retrieve all events sorted by created_at in descending order with a limit.
-    """
-    events = await db.execute(
-        text("SELECT id, name, start_time, end_time, created_at FROM events ORDER BY created_at DESC LIMIT 10")
+@router.get("/api/event/{event_id}/upload/list", summary="Get All Uploads for Event", tags=["Event"])
+async def get_event_uploads(
+    event_id: int,
+    limit: int = Query(pagination.DEFAULT_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_postgresql_read_connection),
+):
+    """
+    Retrieve uploads (photos and comments) for a specific event, newest first.
+    Pass the returned next_cursor to fetch the following page.
+    """
+    params = _keyset_params(cursor, limit)
+    params["event_id"] = event_id
+    keyset = "AND (c.created_at, c.id) < (:cursor_created_at, :cursor_id)" if cursor else ""
+    result = await db.execute(
+        text(f"""
+            SELECT c.id, c.user_id, c.team_id, c.content AS comment, c.photo_url, c.created_at
+            FROM checkins c
+            WHERE c.event_id = :event_id {keyset}
+            ORDER BY c.created_at DESC, c.id DESC
+            LIMIT :limit
+        """),
+        params,
     )
-    result = events.fetchall()
-    return {"events": [dict(row) for row in result]}
+    uploads, next_cursor = pagination.paginate(result.fetchall(), limit)
+    # Column names match the response keys, so rows are encoded straight to bytes
+    return RowJSONResponse({"uploads": uploads, "next_cursor": next_cursor})
+
+
+@router.get("/api/event/all", summary="Get All Events", tags=["Event"])
+async def get_events(
+    request: Request,
+    limit: int = Query(10, ge=1, le=pagination.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retrieve events sorted by created_at in descending order, one page at a time.
+    Pass the returned next_cursor to fetch the following page.
+    Responses carry an ETag; a matching If-None-Match is answered with 304 from Redis.
+    """
+    etag, recent = await resource_version.current_etag_async("events", resource_version.EVENTS_VERSION_KEY)
+    if resource_version.matches(if_none_match, etag):
+        return resource_version.not_modified(etag)
+
+    params = _keyset_params(cursor, limit)
+    keyset = "WHERE (created_at, id) < (:cursor_created_at, :cursor_id)" if cursor else ""
+    # Recently changed lists are read from the primary so the ETag never labels replica-stale rows
+    async with open_read_session(recent or wrote_recently(request)) as db:
+        result = await db.execute(
+            text(f"""
+                SELECT id, name, start_time, end_time, created_at
+                FROM events
+                {keyset}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit
+            """),
+            params,
+        )
+        events, next_cursor = pagination.paginate(result.fetchall(), limit)
+    return RowJSONResponse({"events": events, "next_cursor": next_cursor}, headers=resource_version.headers(etag))
 
 
 @router.get("/api/event/{event_id}", summary="Get Event by ID", tags=["Event"])
-async def get_event(event_id: int, db: AsyncSession = Depends(get_postgresql_connection)):
+async def get_event(
+    request: Request,
+    event_id: int,
+    if_none_match: Optional[str] = Header(None),
+):
     """
     Retrieve a specific event by its ID.
+    Responses carry an ETag; a matching If-None-Match is answered with 304 from Redis.
     """
-    result = await db.execute(text("SELECT * FROM events WHERE id = :id", {"id": event_id}))
-    event = result.fetchone()
+    etag, recent = await resource_version.current_etag_async(f"event-{event_id}", resource_version.event_version_key(event_id))
+    if resource_version.matches(if_none_match, etag):
+        return resource_version.not_modified(etag)
+
+    async with open_read_session(recent or wrote_recently(request)) as db:
+        event = await near_cache.get_event(event_id, db)
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
-    return dict(event)
+    return RowJSONResponse(event, headers=resource_version.headers(etag))
 
 
-@router.post("/api/event/{event_id}/checkin", summary="User Check-in for Event", tags=["Event", "Checkin"])
-async def user_checkin(event_id: int, request: UserCheckinRequest, db: AsyncSession = Depends(get_postgresql_connection)):
+@router.post("/api/event/{event_id}/checkin", summary="User Check-in for Event", tags=["Event", "Checkin"], dependencies=[Depends(marks_write)])
+async def user_checkin(
+    event_id: int,
+    request: UserCheckinRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
     """
     Record a check-in for a user in a specific event.
     """
-    event = await db.execute(text("SELECT * FROM events WHERE id = :id", {"id": event_id}))
-    if not event.fetchone():
+    # Closed before waiting on the micro-batcher, so no pooled connection is held meanwhile
+    async with SessionLocal() as db:
+        event = await near_cache.get_event(event_id, db)
+        team_ids = await near_cache.get_event_team_ids(event_id, db) if event else []
+    if not event:
         raise HTTPException(status_code=404, detail="Event not found")
+    # The check-in is filed under its team's event, so a team from another event must not pass
+    if request.team_id not in team_ids:
+        raise HTTPException(status_code=404, detail="Team not found or not associated with this event")
 
-    task = create_checkin_records_task.apply_async(kwargs={
+    submission = {
         "event_id": event_id,
         "user_id": request.user_id,
-        "team_id": request.team_id,
-        "content": request.content
-    })
+        "team_ids": [request.team_id],
+        "comment": request.content,
+        "photo_url": request.photo_url
+    }
+    claimed = await idempotency.claim(f"event:{event_id}:checkin", idempotency_key, submission)
+    if claimed.replayed:
+        return {"message": "Check-in initiated successfully.", "task_id": claimed.task_id, "replayed": True}
 
-    return {"message": "Check-in initiated successfully.", "task_id": task.id}
+    outcome = await submit_checkin(claimed, submission)
+    return {"message": "Check-in initiated successfully.", **outcome}
 
 
 # ------------------ Team Routes ------------------
 
-@router.post("/api/event/{event_id}/team/create", summary="Create Team for Event", tags=["Event", "Team"])
-def create_team(event_id: int, request: CreateTeamRequest):
+@router.post("/api/event/{event_id}/team/create", summary="Create Team for Event", tags=["Event", "Team"], dependencies=[Depends(marks_write)])
+async def create_team(event_id: int, request: CreateTeamRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     Dispatch a task to create a new team for a specific event.
     """
-    async_result = create_team_task.delay(
-        event_id, request.name, request.description)
+    task_args = [event_id, request.name, request.description]
+    claimed = await idempotency.claim("team:create", idempotency_key, {"args": task_args})
+    if claimed.replayed:
+        return {"message": "Team creation initiated", "task_id": claimed.task_id, "replayed": True}
+
+    try:
+        async_result = create_team_task.apply_async(args=task_args, task_id=claimed.task_id)
+    except Exception:
+        await idempotency.release(claimed)
+        raise
     return {"message": "Team creation initiated", "task_id": async_result.id}
 
 
+# The cached team reads below fill Redis from the primary: a lagging replica would stay cached for READ_CACHE_TTL
 @router.get("/api/user/{user_id}/teams", summary="Get User Teams", tags=["User"], response_description="使用者的隊伍列表")
-def get_user_teams(user_id: int):
+async def get_user_teams(user_id: int, db: AsyncSession = Depends(get_postgresql_connection)):
     """
     Get all teams the user has joined.
     """
-    # 呼叫 Celery 任務
-    task = celery_app.send_task("tasks.get_user_teams", args=[user_id])
-    return {"task_id": task.id}
+    async def load():
+        result = await db.execute(
+            text("""
+                SELECT t.id, t.name, t.event_id
+                FROM user_teams ut
+                JOIN teams t ON t.id = ut.team_id
+                WHERE ut.user_id = :user_id
+                ORDER BY t.id
+            """),
+            {"user_id": user_id},
+        )
+        return result.fetchall()
+
+    teams = await read_cache.read_through_json(read_cache.user_teams_key(user_id), load)
+    return RawJSONResponse(serialization.embed({"user_id": user_id}, "teams", teams))
 
 
 @router.get("/api/event/{event_id}/teams", summary="Get Teams for an Event", tags=["Event"], response_description="活動的隊伍列表")
-def get_teams_for_event(event_id: int):
-    """
-    Get all teams for a specific event.
-    """
-    # 呼叫 Celery 任務
-    task = celery_app.send_task("tasks.get_teams", args=[event_id])
-    return {"task_id": task.id}
+async def get_teams_for_event(event_id: int, db: AsyncSession = Depends(get_postgresql_connection)):
+    """
+    Get all teams for a specific event, including their members.
+    """
+    async def load():
+        result = await db.execute(
+            text("""
+                SELECT t.id AS team_id, t.name AS team_name, u.id AS user_id, u.username
+                FROM events e
+                LEFT JOIN teams t ON t.event_id = e.id
+                LEFT JOIN user_teams ut ON ut.team_id = t.id
+                LEFT JOIN users u ON u.id = ut.user_id
+                WHERE e.id = :event_id
+                ORDER BY t.id, u.id
+            """),
+            {"event_id": event_id},
+        )
+        rows = result.fetchall()
+        if not rows:
+            return None
+
+        teams = {}
+        for row in rows:
+            if row.team_id is None:
+                continue
+            team = teams.setdefault(row.team_id, {"id": row.team_id, "name": row.team_name, "members": []})
+            if row.user_id is not None:
+                team["members"].append({"id": row.user_id, "username": row.username})
+        return list(teams.values())
+
+    teams = await read_cache.read_through_json(read_cache.event_teams_key(event_id), load)
+    if teams is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return RawJSONResponse(serialization.embed({"event_id": event_id}, "teams", teams))
 
 
-@router.post("/api/event/{event_id}/teams/join", summary="User Join Team", tags=["Event", "Team"])
-def join_team(event_id: int, request: JoinTeamRequest):
+@router.post("/api/event/{event_id}/teams/join", summary="User Join Team", tags=["Event", "Team"], dependencies=[Depends(marks_write)])
+async def join_team(event_id: int, request: JoinTeamRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     Dispatch a task to allow a user to join a team in a specific event.
     """
-    async_result = join_team_task.delay(
-        event_id, request.user_id, request.team_id)
+    task_args = [event_id, request.user_id, request.team_id]
+    claimed = await idempotency.claim("team:join", idempotency_key, {"args": task_args})
+    if claimed.replayed:
+        return {"message": "Join team initiated", "task_id": claimed.task_id, "replayed": True}
+
+    try:
+        async_result = join_team_task.apply_async(args=task_args, task_id=claimed.task_id)
+    except Exception:
+        await idempotency.release(claimed)
+        raise
     return {"message": "Join team initiated", "task_id": async_result.id}
 
+@router.post("/api/event/{event_id}/teams/join/bulk", summary="Bulk Join Teams", tags=["Event", "Team"], dependencies=[Depends(marks_write)])
+async def bulk_join_teams(event_id: int, request: BulkJoinTeamRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
+    """
+    Dispatch a task adding many (user_id, team_id) pairs with a single insert statement.
+    Pairs whose team is not in this event, whose user does not exist or who are already members are skipped.
+    """
+    members = [[member.user_id, member.team_id] for member in request.members]
+    claimed = await idempotency.claim("team:join:bulk", idempotency_key, {"event_id": event_id, "members": members})
+    if claimed.replayed:
+        return {"message": "Bulk join initiated", "task_id": claimed.task_id, "replayed": True}
+
+    try:
+        async_result = bulk_join_teams_task.apply_async(args=[event_id, members], task_id=claimed.task_id)
+    except Exception:
+        await idempotency.release(claimed)
+        raise
+    return {"message": "Bulk join initiated", "task_id": async_result.id, "count": len(members)}
+
 @router.get("/api/team/{team_id}/members", summary="Get Team Members", tags=["Team"], response_description="隊伍的成員列表")
-def get_team_members(team_id: int):
+async def get_team_members(team_id: int, db: AsyncSession = Depends(get_postgresql_connection)):
     """
     Retrieve all members of a specific team using the user_teams association table.
     """
-    # 呼叫 Celery 任務
-    task = celery_app.send_task("tasks.get_team_members", args=[team_id])
-    return {"task_id": task.id}
+    async def load():
+        result = await db.execute(
+            text("""
+                SELECT t.id AS team_id, u.id AS user_id, u.username
+                FROM teams t
+                LEFT JOIN user_teams ut ON ut.team_id = t.id
+                LEFT JOIN users u ON u.id = ut.user_id
+                WHERE t.id = :team_id
+                ORDER BY u.id
+            """),
+            {"team_id": team_id},
+        )
+        rows = result.fetchall()
+        if not rows:
+            return None
+        return [{"id": row.user_id, "username": row.username} for row in rows if row.user_id is not None]
+
+    members = await read_cache.read_through_json(read_cache.team_members_key(team_id), load)
+    if members is None:
+        raise HTTPException(status_code=404, detail="Team not found")
+    return RawJSONResponse(serialization.embed({"team_id": team_id}, "members", members))
 
 # ------------------ Score Routes ------------------
 
 
 @router.get("/api/event/{event_id}/ranking", summary="Get Event Rankings", tags=["Event", "Ranking"])
-async def get_event_ranking(event_id: int, db: AsyncSession = Depends(get_postgresql_connection)):
-    """
-    Retrieve ranking information for an event and calculate scores asynchronously.
-    """
-    teams = await db.execute(text("SELECT id FROM teams WHERE event_id = :event_id", {"event_id": event_id}))
-    team_ids = [team.id for team in teams.fetchall()]
-
-    # Dispatch score calculation tasks
-    async_results = [calculate_team_score_task.delay(team_id) for team_id in team_ids]
-    return {"message": "Ranking calculation initiated", "tasks": [result.id for result in async_results]}
+def get_event_ranking(
+    event_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    team_id: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    Retrieve a page of the event leaderboard (top-K when offset is 0) from the Redis sorted set.
+    Pass team_id to also get the rank of a specific team.
+    Responses carry an ETag; a matching If-None-Match is answered with 304.
+    """
+    # 先取版本號再讀排行榜：期間若有寫入，ETag 只會比內容舊，下次請求仍會取得新內容
+    etag, _ = resource_version.current_etag(redis_conn, f"ranking-{event_id}", resource_version.event_version_key(event_id))
+    if resource_version.matches(if_none_match, etag):
+        return resource_version.not_modified(etag)
+
+    response = {
+        "event_id": event_id,
+        "total": leaderboard.get_team_count(redis_conn, event_id),
+        "rankings": leaderboard.get_ranking_page(redis_conn, event_id, offset, limit),
+    }
+    if team_id is not None:
+        team_rank = leaderboard.get_team_rank(redis_conn, event_id, team_id)
+        if team_rank is None:
+            raise HTTPException(status_code=404, detail="Team not found in event ranking")
+        response["team"] = team_rank
+    return RowJSONResponse(response, headers=resource_version.headers(etag))
 
 @router.get("/api/team/{team_id}/score", summary="Get Team Score", tags=["Team", "Score"])
 def get_team_score(team_id: int):
     """
     Retrieve the team's score. Check Redis cache first; if not available, calculate it asynchronously.
+    Concurrent misses share one in-flight calculation and get the same task id.
     """
-    from database import get_redis_connection
-    redis_conn = get_redis_connection()
-    score = redis_conn.get(f"team:{team_id}:score")
+    result = score_singleflight.get_or_compute(redis_conn, team_id)
 
-    if score is not None:
-        return {"team_id": team_id, "score": float(score)}
+    if "score" in result:
+        TEAM_SCORE_CACHE_REQUESTS.labels(result="hit").inc()
+        return {"team_id": team_id, "score": result["score"]}
 
-    # If not cached, calculate asynchronously
-    async_result = calculate_team_score_task.delay(team_id)
-    return {"message": "Score calculation initiated", "task_id": async_result.id}
+    # If not cached, attach to the in-flight calculation or start one
+    TEAM_SCORE_CACHE_REQUESTS.labels(result="miss").inc()
+    return {"message": "Score calculation initiated", "task_id": result["task_id"], "coalesced": result["coalesced"]}
 
 
-@router.post("/api/score/update", summary="Batch Update Team Scores", tags=["Score"])
-def update_scores(request: UpdateScoreRequest):
+@router.post("/api/score/update", summary="Batch Update Team Scores", tags=["Score"], dependencies=[Depends(marks_write)])
+async def update_scores(request: UpdateScoreRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
     Dispatch a task to batch update team scores asynchronously.
     """
-    # Validate the request data
-    if not request.scores or not isinstance(request.scores, list):
-        raise HTTPException(
-            status_code=400, detail="Invalid scores data. It should be a list of team scores.")
-
     # Prepare the scores for the task
     scores = [{"team_id": score.team_id, "value": score.value}
               for score in request.scores]
 
+    claimed = await idempotency.claim("score:update", idempotency_key, {"scores": scores})
+    if claimed.replayed:
+        return {"message": "Batch score update initiated", "task_id": claimed.task_id, "replayed": True}
+
     # Dispatch the Celery task
-    async_result = persist_team_scores_task.delay(scores)
+    try:
+        async_result = persist_team_scores_task.apply_async(args=[scores], task_id=claimed.task_id)
+    except Exception:
+        await idempotency.release(claimed)
+        raise
 
     return {"message": "Batch score update initiated", "task_id": async_result.id}
 
+def get_task_status(task_id: str) -> dict:
+    """
+    Read the state of a Celery task from the result backend.
+    """
+    result = AsyncResult(task_id, app=celery_app)
+    state = result.state
+
+    if state == "PENDING":
+        return {"status": state, "message": "Task is pending."}
+    elif state == "SUCCESS":
+        return {"status": state, "result": result.result}
+    elif state == "FAILURE":
+        return {"status": state, "error": str(result.info)}
+    else:
+        return {"status": state, "message": "Task is in progress."}
+
+
 @router.get("/api/event/status/{task_id}", summary="Get Event Creation Status", tags=["Event"])
-async def get_event_status(task_id: str):
+async def get_event_status(task_id: str, response: Response, wait: Optional[str] = None):
     """
     Check the status of a Celery task.
+    With ?wait=5s the request long-polls until the task finishes or the wait elapses.
+    A SUCCESS status restarts the read-your-writes window, since the write has only now been committed.
     """
-    result = AsyncResult(task_id, app=celery_app)
-    
-    if result.state == "PENDING":
-        return {"status": result.state, "message": "Task is pending."}
-    elif result.state == "SUCCESS":
-        return {"status": result.state, "result": result.result}
-    elif result.state == "FAILURE":
-        return {"status": result.state, "error": str(result.info)}
+    if not wait:
+        status = await run_in_threadpool(get_task_status, task_id)
     else:
-        return {"status": result.state, "message": "Task is in progress."}
\ No newline at end of file
+        status = await wait_for_task_status(task_id, wait)
+    if status["status"] == "SUCCESS":
+        mark_write(response)
+    return status
+
+async def wait_for_task_status(task_id: str, wait: str) -> dict:
+    try:
+        timeout = task_events.parse_wait(wait)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid wait value, e.g. 5s or 500ms")
+
+    # Subscribe before reading the state so a completion in between is not missed
+    try:
+        pubsub = await task_events.subscribe_task(task_id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Too many status waiters, retry without wait")
+    try:
+        status = await run_in_threadpool(get_task_status, task_id)
+        deadline = time.monotonic() + timeout
+        while not task_events.is_terminal(status["status"]):
+            remaining = deadline - time.monotonic()
+            if not await task_events.wait_for_notification(pubsub, remaining):
+                break
+            status = await run_in_threadpool(get_task_status, task_id)
+        return status
+    finally:
+        await task_events.close_subscription(pubsub)
+
+
+@router.get("/api/event/status/{task_id}/stream", summary="Stream Task Status", tags=["Event"])
+async def stream_event_status(task_id: str):
+    """
+    Server-Sent Events stream of a Celery task's status; closes once the task finishes
+    or after MAX_WAIT_SECONDS (a "timeout" event is sent, clients reconnect to keep waiting).
+    """
+    try:
+        pubsub = await task_events.subscribe_task(task_id)
+    except RedisError:
+        raise HTTPException(status_code=503, detail="Too many status waiters, retry later")
+
+    async def event_stream():
+        try:
+            status = await run_in_threadpool(get_task_status, task_id)
+            yield f"event: status\ndata: {json.dumps(status, default=str)}\n\n"
+            deadline = time.monotonic() + task_events.MAX_WAIT_SECONDS
+            while not task_events.is_terminal(status["status"]):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield f"event: timeout\ndata: {json.dumps(status, default=str)}\n\n"
+                    break
+                if not await task_events.wait_for_notification(pubsub, min(remaining, task_events.SSE_HEARTBEAT_SECONDS)):
+                    yield ": keep-alive\n\n"
+                    continue
+                status = await run_in_threadpool(get_task_status, task_id)
+                yield f"event: status\ndata: {json.dumps(status, default=str)}\n\n"
+        finally:
+            await task_events.close_subscription(pubsub)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
\ No newline at end of file
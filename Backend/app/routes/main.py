@@ -1,10 +1,15 @@
+import os
 import re
-from fastapi import APIRouter, Depends, HTTPException
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
 from datetime import datetime, timedelta, timezone
-from database import get_postgresql_connection, get_redis_connection
+from database import get_postgresql_connection, get_postgresql_read_connection, marks_write
+from redis_client import get_redis, get_pool_stats
 
 from models import Event, Team, User, Checkin, Score, Ranking
 from models.association import user_teams
@@ -16,14 +21,16 @@ from request.main import (
     UpdateScoreRequest,
     CreateEventRequest,
     JoinTeamRequest,
-    UploadRequest,
 )
-from tasks import register_user_task, create_checkin_records_task
+from services import password_hasher, idempotency, user_import
+from tasks import register_user_task
 
-# 加密設定與時區
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 時區
 utc_plus_8 = timezone(timedelta(hours=8))
 
+# 管理 API (例如批次匯入使用者) 需在 X-Admin-Token 標頭帶入此值；未設定時管理 API 一律拒絕
+ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
+
 # 定義 API 路由
 router = APIRouter()
 
@@ -43,36 +50,76 @@ def test_redis_connection():
     Test connection to Redis by sending a PING command.
     """
     try:
-        redis_conn = get_redis_connection()
-        pong = redis_conn.ping()
+        pong = get_redis().ping()
         return {"message": "Redis connection successful", "response": "PONG" if pong else "No response"}
     except Exception as e:
         return {"message": "Redis connection failed", "error": str(e)}
 
+
+@router.get("/api/redis/pool", summary="Redis Pool Stats", tags=["System"])
+def redis_pool_stats():
+    """
+    Connection pool stats for this process (in use, created, wait time).
+    """
+    return get_pool_stats()
+
+
+@router.get("/api/system/password-hasher", summary="Password Hasher Stats", tags=["System"])
+def password_hasher_stats():
+    """
+    Process-pool password hashing stats (workers, in-flight jobs, queue wait).
+    """
+    return password_hasher.get_stats()
+
 # ------------------ User Routes ------------------
 
 
-@router.post("/api/user/register", summary="Register User", tags=["User"])
-def register_user(request: RegisterUserRequest):
+@router.post("/api/user/register", summary="Register User", tags=["User"], dependencies=[Depends(marks_write)])
+async def register_user(request: RegisterUserRequest, idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")):
     """
-    Dispatch a task to register a new user.
+    Hash the password in the process pool, then dispatch a task to register a new user.
+    Retries with the same Idempotency-Key return the original task ID without queueing again.
     """
-    # Dispatch the task to the Celery worker
-    async_result = register_user_task.delay(request.username, request.email, request.password)
-    
+    claimed = await idempotency.claim("user:register", idempotency_key, {
+        "username": request.username,
+        "email": request.email,
+    })
+    if claimed.replayed:
+        return {"message": "User registration initiated", "task_id": claimed.task_id, "replayed": True}
+
+    try:
+        hashed_password = await password_hasher.hash_password(request.password)
+
+        # Dispatch the task to the Celery worker (only the hash travels through the broker)
+        async_result = register_user_task.apply_async(
+            args=[request.username, request.email, hashed_password], task_id=claimed.task_id)
+    except Exception:
+        await idempotency.release(claimed)
+        raise
+
     # Return task ID to track the status
     return {"message": "User registration initiated", "task_id": async_result.id}
 
 
 @router.post("/api/user/login", summary="User Login", tags=["User"])
-def login_user(request: LoginRequest, db: Session = Depends(get_postgresql_connection)):
+async def login_user(request: LoginRequest, db: AsyncSession = Depends(get_postgresql_connection)):
     """
     User login: Verify email and password, then return success message only.
+    Hashes made with a different bcrypt cost are transparently rehashed.
     """
-    user = db.query(User).filter(User.email == request.email).first()
-    if not user or not pwd_context.verify(request.password, user.password):
+    result = await db.execute(select(User).filter(User.email == request.email))
+    user = result.scalars().first()
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+
+    valid, new_hash = await password_hasher.verify_password(request.password, user.password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    if new_hash:
+        user.password = new_hash
+        await db.commit()
+
     return {
         "message": "Login successful",
         "username": user.username,
@@ -89,12 +136,41 @@ async def logout():
     """
     return {"message": "Logout successful"}
 
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """
+    Reject the request unless X-Admin-Token matches ADMIN_API_TOKEN (admin routes are disabled when it is unset).
+    """
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/api/admin/users/import", summary="Bulk Import Users", tags=["Admin"], dependencies=[Depends(require_admin_token)])
+async def import_users(
+    request: Request,
+    format: Optional[str] = Query(None, regex="^(csv|ndjson)$", description="Defaults to the Content-Type (CSV unless NDJSON)"),
+    db: AsyncSession = Depends(get_postgresql_connection),
+):
+    """
+    Register many users from a streamed CSV (username,email,password header) or NDJSON request body.
+    Requires the X-Admin-Token header; the import_users.py CLI needs no token.
+    Returns a per-row report: created, exists, duplicate (within the file) or invalid.
+    """
+    fmt = format or user_import.detect_format(request.headers.get("content-type"))
+    try:
+        rows = await user_import.parse_rows(request.stream(), fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await user_import.import_users(db, rows)
+
 @router.get("/api/user/{user_id}/info", summary="Get User Info", tags=["User"])
-def get_user_info(user_id: int, db: Session = Depends(get_postgresql_connection)):
+async def get_user_info(user_id: int, db: AsyncSession = Depends(get_postgresql_read_connection)):
     """
     Get information of a specific user by user_id.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).filter(User.id == user_id))
+    user = result.scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
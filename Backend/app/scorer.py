@@ -0,0 +1,22 @@
+"""
+Check-in stream scorer: consumes checkins:stream as part of the "scorers" consumer
+group and rescores each affected team once per batch (see services/score_updater.py).
+
+    python scorer.py [consumer-name]
+
+Run as many processes as needed; entries are split across the group and entries left
+pending by a crashed process are reclaimed after SCORER_CLAIM_IDLE_MS.
+"""
+import sys
+import logging
+
+from services import score_updater
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+)
+
+
+if __name__ == "__main__":
+    score_updater.run(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,122 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from celery import states
+from celery.result import AsyncResult
+from fastapi.concurrency import run_in_threadpool
+
+from database import celery_app
+from services import task_events
+
+logger = logging.getLogger(__name__)
+
+# 收集打卡請求的時間窗 (毫秒) 與每批上限，任一條件達到即送出一個批次任務
+CHECKIN_BATCH_WINDOW_MS = float(os.getenv("CHECKIN_BATCH_WINDOW_MS", 10))
+CHECKIN_BATCH_MAX_ITEMS = int(os.getenv("CHECKIN_BATCH_MAX_ITEMS", 200))
+# 等待批次任務完成的上限；逾時的請求改回傳 request_id 讓客戶端查詢狀態
+CHECKIN_BATCH_TIMEOUT = float(os.getenv("CHECKIN_BATCH_TIMEOUT", 10))
+
+
+class CheckinBatcher:
+    """
+    API 行程內的打卡請求微批次：同一個時間窗內的請求合併為一個 Celery 任務、一個交易，
+    任務完成後將各請求的結果交回等待中的呼叫者
+    """
+
+    def __init__(self, window_ms: float, max_items: int, timeout: float):
+        self.window = window_ms / 1000
+        self.max_items = max_items
+        self.timeout = timeout
+        self._pending = []
+        self._timer = None
+        self._running = set()
+
+    async def submit(self, submission: dict):
+        """
+        加入一筆打卡請求 ({request_id, event_id, user_id, team_ids, comment, photo_url})，
+        回傳該請求的結果；批次任務未在時限內完成時回傳 None
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((submission, future))
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch: list):
+        try:
+            results = await self._dispatch([submission for submission, _ in batch])
+            for submission, future in batch:
+                if not future.done():
+                    future.set_result(results.get(submission["request_id"]) if results else None)
+        except Exception as e:
+            logger.error(f"Check-in batch of {len(batch)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _dispatch(self, submissions: list):
+        from tasks import create_checkin_batch_task
+
+        task_id = str(uuid.uuid4())
+        # 先訂閱完成通知再送出任務，避免錯過通知
+        pubsub = await task_events.subscribe_task(task_id)
+        try:
+            await run_in_threadpool(create_checkin_batch_task.apply_async, args=[submissions], task_id=task_id)
+
+            result = AsyncResult(task_id, app=celery_app)
+            deadline = time.monotonic() + self.timeout
+            while True:
+                if not await task_events.wait_for_notification(pubsub, deadline - time.monotonic()):
+                    return None
+                state = await run_in_threadpool(lambda: result.state)
+                if task_events.is_terminal(state):
+                    break
+
+            if state != states.SUCCESS:
+                raise RuntimeError(f"Check-in batch {task_id} ended in {state}")
+            return await run_in_threadpool(lambda: result.result)
+        finally:
+            await task_events.close_subscription(pubsub)
+
+    async def drain(self):
+        """
+        送出尚在時間窗內的請求並等待進行中的批次 (關閉時呼叫)
+        """
+        self._flush()
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+
+_batcher = None
+
+
+def get_batcher() -> CheckinBatcher:
+    global _batcher
+    if _batcher is None:
+        _batcher = CheckinBatcher(CHECKIN_BATCH_WINDOW_MS, CHECKIN_BATCH_MAX_ITEMS, CHECKIN_BATCH_TIMEOUT)
+    return _batcher
+
+
+async def submit(submission: dict):
+    return await get_batcher().submit(submission)
+
+
+async def drain():
+    if _batcher is not None:
+        await _batcher.drain()
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone, timedelta
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from models import Checkin, Team
+from . import team_stats
+
+utc_plus_8 = timezone(timedelta(hours=8))
+
+
+def insert_checkin_batch(db: Session, submissions: list) -> list:
+    """
+    多筆打卡請求 ({user_id, team_ids, comment, photo_url}) 以單一 INSERT ... RETURNING 寫入並更新 team_stats (不 commit)。
+    回傳與 submissions 順序相同的列表，每個元素為該請求建立的打卡紀錄。
+    """
+    # created_at 欄位為不含時區的 TIMESTAMP，一律存 UTC
+    current_time = datetime.now(timezone.utc).replace(tzinfo=None)
+    team_ids = {team_id for submission in submissions for team_id in submission["team_ids"]}
+    if not team_ids:
+        return [[] for _ in submissions]
+
+    # event_id 以隊伍所屬活動為準 (不信任請求帶入的 event_id)，整批只查一次
+    team_events = dict(db.execute(select(Team.id, Team.event_id).where(Team.id.in_(team_ids))).all())
+    params = [
+        {
+            "user_id": submission["user_id"],
+            "team_id": team_id,
+            "event_id": team_events.get(team_id),
+            "content": submission["comment"] or "",
+            "photo_url": submission["photo_url"],
+            "created_at": current_time,
+        }
+        for submission in submissions
+        for team_id in submission["team_ids"]
+    ]
+
+    # RETURNING 依參數順序回傳，才能切回各請求
+    rows = db.execute(
+        insert(Checkin).returning(
+            Checkin.id, Checkin.team_id, Checkin.created_at, sort_by_parameter_order=True
+        ),
+        params,
+    ).all()
+
+    # 同一個交易中累加隊伍統計值
+    team_stats.record_checkins(db, [row.id for row in rows])
+
+    results = []
+    offset = 0
+    for submission in submissions:
+        count = len(submission["team_ids"])
+        results.append([
+            {
+                "team_id": row.team_id,
+                "checkin_id": row.id,
+                "photo_url": submission["photo_url"],
+                "created_at": row.created_at.replace(tzinfo=timezone.utc).astimezone(utc_plus_8).isoformat(),
+            }
+            for row in rows[offset:offset + count]
+        ])
+        offset += count
+    return results
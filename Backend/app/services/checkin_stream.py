@@ -0,0 +1,46 @@
+import os
+from redis import Redis
+from redis.exceptions import ResponseError
+
+# 打卡事件流：每筆打卡一個 entry (event_id, team_id, user_id, checkin_id, ts)，由計分 consumer group 消費
+CHECKIN_STREAM_KEY = "checkins:stream"
+# 多次投遞仍處理失敗的 entry 移到這裡，避免卡住 consumer group
+CHECKIN_DEAD_LETTER_KEY = "checkins:stream:dead"
+SCORER_GROUP = "scorers"
+
+# 事件流約略保留的筆數 (MAXLEN ~)；需大於 consumer 最大可能的積壓量
+CHECKIN_STREAM_MAXLEN = int(os.getenv("CHECKIN_STREAM_MAXLEN", 1000000))
+
+
+def append_checkin_batch(redis_conn: Redis, submissions: list):
+    """
+    多個打卡請求 [(event_id, user_id, checkins)] (checkins 為 insert_checkin_batch 的回傳值) 一起寫入事件流，一次 round trip
+    """
+    pipe = redis_conn.pipeline(transaction=False)
+    for event_id, user_id, checkins in submissions:
+        for checkin in checkins:
+            pipe.xadd(
+                CHECKIN_STREAM_KEY,
+                {
+                    "event_id": event_id if event_id is not None else "",
+                    "team_id": checkin["team_id"],
+                    "user_id": user_id,
+                    "checkin_id": checkin["checkin_id"],
+                    "ts": checkin["created_at"],
+                },
+                maxlen=CHECKIN_STREAM_MAXLEN,
+                approximate=True,
+            )
+    pipe.execute()
+
+
+def ensure_group(redis_conn: Redis):
+    """
+    建立計分 consumer group (已存在時略過)；從事件流開頭開始消費
+    """
+    try:
+        redis_conn.xgroup_create(CHECKIN_STREAM_KEY, SCORER_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
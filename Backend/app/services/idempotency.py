@@ -0,0 +1,88 @@
+import os
+import json
+import uuid
+import hashlib
+import logging
+from typing import NamedTuple, Optional
+from redis.exceptions import RedisError
+
+from redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# Idempotency-Key 保存秒數，期間內相同 key 的請求直接回傳原本的 task id
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", 86400))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+IDEMPOTENCY_KEY = "idem:{scope}:{key}"
+
+# 只有仍是自己的 task id 時才刪除 (送出任務失敗時釋放 key)
+_RELEASE_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and cjson.decode(value)['task_id'] == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class IdempotencyKeyError(ValueError):
+    """
+    Idempotency-Key 格式錯誤，或同一個 key 被用在內容不同的請求
+    """
+
+
+class Claim(NamedTuple):
+    key: Optional[str]
+    task_id: Optional[str]
+    replayed: bool
+
+
+def _fingerprint(payload: dict) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+async def claim(scope: str, idempotency_key: Optional[str], payload: dict) -> Claim:
+    """
+    以 Idempotency-Key 保留一個 task id。
+    第一次請求回傳新的 task id (replayed=False)，之後相同 key 回傳原本的 task id (replayed=True)；
+    沒有帶 key 或 Redis 無法使用時 task_id 為 None，由 Celery 自行產生。
+    """
+    if not idempotency_key:
+        return Claim(None, None, False)
+    if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise IdempotencyKeyError(f"Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+
+    key = IDEMPOTENCY_KEY.format(scope=scope, key=idempotency_key)
+    fingerprint = _fingerprint(payload)
+    task_id = str(uuid.uuid4())
+    redis_conn = get_async_redis()
+    try:
+        value = json.dumps({"task_id": task_id, "fingerprint": fingerprint})
+        if await redis_conn.set(key, value, nx=True, ex=IDEMPOTENCY_TTL):
+            return Claim(key, task_id, False)
+        existing = await redis_conn.get(key)
+    except RedisError as e:
+        logger.warning(f"Idempotency store unavailable for {key}: {e}")
+        return Claim(None, None, False)
+
+    if existing is None:
+        # key 剛好過期，重新保留
+        return await claim(scope, idempotency_key, payload)
+
+    existing = json.loads(existing)
+    if existing["fingerprint"] != fingerprint:
+        raise IdempotencyKeyError("Idempotency-Key was already used for a different request")
+    return Claim(key, existing["task_id"], True)
+
+
+async def release(claimed: Claim):
+    """
+    任務沒有成功送出時釋放 key，讓客戶端可以用同一個 key 重試
+    """
+    if claimed.key is None or claimed.replayed:
+        return
+    try:
+        await get_async_redis().eval(_RELEASE_SCRIPT, 1, claimed.key, claimed.task_id)
+    except RedisError as e:
+        logger.warning(f"Failed to release idempotency key {claimed.key}: {e}")
@@ -0,0 +1,82 @@
+from redis import Redis
+
+from . import resource_version
+
+# 每個活動一個 Sorted Set，member 為 team_id、score 為隊伍分數
+LEADERBOARD_KEY = "event:{event_id}:leaderboard"
+# 隊伍名稱快取，排名查詢不需回 PostgreSQL
+TEAM_NAMES_KEY = "event:{event_id}:team_names"
+
+
+def _leaderboard_key(event_id: int) -> str:
+    return LEADERBOARD_KEY.format(event_id=event_id)
+
+
+def _team_names_key(event_id: int) -> str:
+    return TEAM_NAMES_KEY.format(event_id=event_id)
+
+
+def register_team(redis_conn: Redis, event_id: int, team_id: int, team_name: str):
+    """
+    新隊伍加入排行榜，初始分數為 0 (已存在則不覆蓋分數)
+    """
+    pipe = redis_conn.pipeline()
+    pipe.zadd(_leaderboard_key(event_id), {team_id: 0}, nx=True)
+    pipe.hset(_team_names_key(event_id), team_id, team_name)
+    resource_version.queue_bump(pipe, resource_version.event_version_key(event_id))
+    pipe.execute()
+
+
+def queue_team_scores(pipe, entries: list):
+    """
+    將多個隊伍的分數更新 [(event_id, team_id, score, team_name)] 加入 pipeline，由呼叫端一次送出。
+    排行榜與各活動的版本號在同一個 MULTI 中更新，ETag 不會落後於分數
+    """
+    for event_id, team_id, score, team_name in entries:
+        pipe.zadd(_leaderboard_key(event_id), {team_id: score})
+        if team_name is not None:
+            pipe.hset(_team_names_key(event_id), team_id, team_name)
+    for event_id in dict.fromkeys(event_id for event_id, _, _, _ in entries):
+        resource_version.queue_bump(pipe, resource_version.event_version_key(event_id))
+
+
+def get_team_count(redis_conn: Redis, event_id: int) -> int:
+    """
+    排行榜中的隊伍數量
+    """
+    return redis_conn.zcard(_leaderboard_key(event_id))
+
+
+def get_ranking_page(redis_conn: Redis, event_id: int, offset: int = 0, limit: int = 10) -> list:
+    """
+    依分數由高到低取得排行榜的一段 (top-K 即 offset=0)，O(log n + limit)
+    """
+    entries = redis_conn.zrevrange(_leaderboard_key(event_id), offset, offset + limit - 1, withscores=True)
+    if not entries:
+        return []
+
+    team_ids = [team_id for team_id, _ in entries]
+    names = redis_conn.hmget(_team_names_key(event_id), team_ids)
+    return [
+        {
+            "rank": offset + index + 1,
+            "team_id": int(team_id),
+            "team_name": name,
+            "score": score,
+        }
+        for index, ((team_id, score), name) in enumerate(zip(entries, names))
+    ]
+
+
+def get_team_rank(redis_conn: Redis, event_id: int, team_id: int):
+    """
+    取得單一隊伍的名次與分數，O(log n)；隊伍不在排行榜中時回傳 None
+    """
+    pipe = redis_conn.pipeline()
+    pipe.zrevrank(_leaderboard_key(event_id), team_id)
+    pipe.zscore(_leaderboard_key(event_id), team_id)
+    pipe.hget(_team_names_key(event_id), team_id)
+    rank, score, name = pipe.execute()
+    if rank is None:
+        return None
+    return {"rank": rank + 1, "team_id": team_id, "team_name": name, "score": score}
@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from sqlalchemy.sql import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# 行程內快取設定：存活秒數與最大筆數 (超過時淘汰最久未使用者)
+NEAR_CACHE_TTL = float(os.getenv("NEAR_CACHE_TTL", 30))
+NEAR_CACHE_MAX_ENTRIES = int(os.getenv("NEAR_CACHE_MAX_ENTRIES", 1024))
+
+# 資料變更時發佈到此頻道，所有 API / worker 行程收到後清除對應項目
+INVALIDATION_CHANNEL = "near_cache:invalidate"
+
+EVENT_SQL = text("SELECT id, name, description, start_time, end_time, created_at FROM events WHERE id = :event_id")
+EVENT_TEAM_IDS_SQL = text("SELECT id FROM teams WHERE event_id = :event_id ORDER BY id")
+
+
+class TTLCache:
+    """
+    有上限的 TTL + LRU 快取 (執行緒安全)
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        回傳 (是否命中, 值)
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_events = TTLCache(NEAR_CACHE_TTL, NEAR_CACHE_MAX_ENTRIES)
+_event_team_ids = TTLCache(NEAR_CACHE_TTL, NEAR_CACHE_MAX_ENTRIES)
+_caches = {"event": _events, "event_teams": _event_team_ids}
+
+
+# ------------------ Invalidation ------------------
+
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def _listen():
+    while True:
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # 重新訂閱期間可能錯過通知，全部清除
+            for cache in _caches.values():
+                cache.clear()
+            for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                kind, _, key = message["data"].partition(":")
+                cache = _caches.get(kind)
+                if cache is not None:
+                    cache.delete(int(key))
+        except Exception as e:
+            logger.warning(f"Near-cache invalidation listener error, resubscribing: {e}")
+            time.sleep(1)
+
+
+def _ensure_listener():
+    """
+    每個行程 (含 fork 出的 worker) 啟動一次背景訂閱執行緒
+    """
+    global _listener_pid
+    if _listener_pid == os.getpid():
+        return
+    with _listener_lock:
+        if _listener_pid != os.getpid():
+            threading.Thread(target=_listen, name="near-cache-invalidation", daemon=True).start()
+            _listener_pid = os.getpid()
+
+
+def publish_invalidation(redis_conn, kind: str, event_id: int):
+    """
+    通知所有行程清除快取；kind 為 "event" 或 "event_teams"
+    """
+    try:
+        redis_conn.publish(INVALIDATION_CHANNEL, f"{kind}:{event_id}")
+    except Exception as e:
+        logger.warning(f"Failed to publish near-cache invalidation {kind}:{event_id}: {e}")
+
+
+# ------------------ Event ------------------
+
+async def get_event(event_id: int, db: AsyncSession):
+    """
+    取得活動資料 (dict)；不存在時回傳 None
+    """
+    _ensure_listener()
+    hit, event = _events.get(event_id)
+    if hit:
+        return event
+    row = (await db.execute(EVENT_SQL, {"event_id": event_id})).fetchone()
+    event = dict(row._mapping) if row else None
+    if event is not None:
+        _events.set(event_id, event)
+    return event
+
+
+# ------------------ Event Team IDs ------------------
+
+async def get_event_team_ids(event_id: int, db: AsyncSession) -> list:
+    """
+    取得活動中所有隊伍的 id
+    """
+    _ensure_listener()
+    hit, team_ids = _event_team_ids.get(event_id)
+    if hit:
+        return team_ids
+    team_ids = [row.id for row in await db.execute(EVENT_TEAM_IDS_SQL, {"event_id": event_id})]
+    _event_team_ids.set(event_id, team_ids)
+    return team_ids
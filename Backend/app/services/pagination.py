@@ -0,0 +1,38 @@
+import json
+import base64
+from datetime import datetime
+
+# 預設與最大每頁筆數
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """
+    將排序鍵 (created_at, id) 編碼為不透明的游標字串
+    """
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    解析游標，回傳 (created_at, id)；格式錯誤時拋出 ValueError
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def paginate(rows: list, limit: int):
+    """
+    查詢時多取一筆 (limit + 1) 判斷是否還有下一頁，回傳 (本頁資料, next_cursor)
+    """
+    page = rows[:limit]
+    if len(rows) > limit:
+        last = page[-1]
+        return page, encode_cursor(last.created_at, last.id)
+    return page, None
@@ -0,0 +1,152 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+
+# bcrypt 成本與工作行程數 (預設為可用 CPU 核心數)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+# 大量雜湊 (匯入使用者) 使用獨立的行程池，登入 / 註冊不會排在匯入後面 (預設為一半的 CPU 核心數)
+PASSWORD_HASH_BULK_WORKERS = int(os.getenv("PASSWORD_HASH_BULK_WORKERS", max(1, (os.cpu_count() or 1) // 2)))
+
+INTERACTIVE_POOL = "interactive"
+BULK_POOL = "bulk"
+POOL_WORKERS = {INTERACTIVE_POOL: PASSWORD_HASH_WORKERS, BULK_POOL: PASSWORD_HASH_BULK_WORKERS}
+
+# rounds 與設定不同的既有雜湊會被視為需要更新 (登入時自動重新雜湊)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+# 各行程池的排隊等待時間統計 (送出到工作行程開始執行)
+_stats_lock = threading.Lock()
+_stats = {
+    pool: {
+        "submitted": 0,
+        "completed": 0,
+        "in_flight": 0,
+        "queue_wait_seconds_total": 0.0,
+        "queue_wait_seconds_max": 0.0,
+    }
+    for pool in POOL_WORKERS
+}
+
+
+# ------------------ Worker process functions ------------------
+
+def _hash(password: str, submitted_at: float):
+    started_at = time.time()
+    return pwd_context.hash(password), started_at - submitted_at
+
+
+def _hash_many(passwords: list, submitted_at: float):
+    started_at = time.time()
+    return [pwd_context.hash(password) for password in passwords], started_at - submitted_at
+
+
+def _verify_and_update(password: str, hashed: str, submitted_at: float):
+    started_at = time.time()
+    valid, new_hash = pwd_context.verify_and_update(password, hashed)
+    return valid, new_hash, started_at - submitted_at
+
+
+# ------------------ Async API ------------------
+
+def get_executor(pool: str = INTERACTIVE_POOL) -> ProcessPoolExecutor:
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = _executors[pool] = ProcessPoolExecutor(max_workers=POOL_WORKERS[pool])
+    return executor
+
+
+def shutdown():
+    """
+    關閉所有行程池的工作行程 (應用程式結束時呼叫)
+    """
+    with _executor_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=True)
+        _executors.clear()
+
+
+async def _submit(pool: str, fn, *args):
+    stats = _stats[pool]
+    with _stats_lock:
+        stats["submitted"] += 1
+        stats["in_flight"] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(get_executor(pool), fn, *args, time.time())
+    finally:
+        with _stats_lock:
+            stats["in_flight"] -= 1
+
+    queue_wait = max(result[-1], 0.0)
+    with _stats_lock:
+        stats["completed"] += 1
+        stats["queue_wait_seconds_total"] += queue_wait
+        stats["queue_wait_seconds_max"] = max(stats["queue_wait_seconds_max"], queue_wait)
+    return result[:-1]
+
+
+async def hash_password(password: str) -> str:
+    """
+    在行程池中計算 bcrypt 雜湊
+    """
+    hashed, = await _submit(INTERACTIVE_POOL, _hash, password)
+    return hashed
+
+
+async def hash_passwords(passwords: list) -> list:
+    """
+    大量雜湊 (例如匯入使用者)：切段後平行送進獨立的 bulk 行程池，每個工作行程分到數段以平衡負載；
+    回傳與輸入順序相同的雜湊
+    """
+    if not passwords:
+        return []
+    chunk_size = max(1, math.ceil(len(passwords) / (PASSWORD_HASH_BULK_WORKERS * 4)))
+    results = await asyncio.gather(*[
+        _submit(BULK_POOL, _hash_many, passwords[start:start + chunk_size])
+        for start in range(0, len(passwords), chunk_size)
+    ])
+    return [hashed for (chunk,) in results for hashed in chunk]
+
+
+async def verify_password(password: str, hashed: str):
+    """
+    驗證密碼；回傳 (是否正確, 新雜湊)。rounds 設定改變時新雜湊不為 None，呼叫端應寫回資料庫
+    """
+    return await _submit(INTERACTIVE_POOL, _verify_and_update, password, hashed)
+
+
+def _pool_stats(pool: str) -> dict:
+    with _stats_lock:
+        stats = dict(_stats[pool])
+    stats["workers"] = POOL_WORKERS[pool]
+    stats["queue_wait_seconds_avg"] = (
+        stats["queue_wait_seconds_total"] / stats["completed"] if stats["completed"] else 0.0
+    )
+    return stats
+
+
+def get_stats() -> dict:
+    """
+    登入 / 註冊行程池的統計，bulk 行程池的統計放在 "bulk" 之下
+    """
+    stats = _pool_stats(INTERACTIVE_POOL)
+    stats["bcrypt_rounds"] = BCRYPT_ROUNDS
+    stats[BULK_POOL] = _pool_stats(BULK_POOL)
+    return stats
@@ -0,0 +1,77 @@
+import os
+import logging
+from redis import Redis
+from redis.exceptions import RedisError
+
+from redis_client import get_async_redis
+from services import serialization
+
+logger = logging.getLogger(__name__)
+
+# 快取存活秒數，設為 0 可關閉讀取快取
+READ_CACHE_TTL = int(os.getenv("READ_CACHE_TTL", 60))
+
+EVENT_TEAMS_KEY = "event:{event_id}:teams"
+USER_TEAMS_KEY = "user:{user_id}:teams"
+TEAM_MEMBERS_KEY = "team:{team_id}:members"
+
+
+def event_teams_key(event_id: int) -> str:
+    return EVENT_TEAMS_KEY.format(event_id=event_id)
+
+
+def user_teams_key(user_id: int) -> str:
+    return USER_TEAMS_KEY.format(user_id=user_id)
+
+
+def team_members_key(team_id: int) -> str:
+    return TEAM_MEMBERS_KEY.format(team_id=team_id)
+
+
+async def read_through(key: str, loader):
+    """
+    先讀 Redis 快取，未命中時呼叫 loader 並寫回快取。
+    loader 回傳 None (例如資料不存在) 時不寫入快取；Redis 故障時直接讀資料庫。
+    """
+    raw = await read_through_json(key, loader)
+    return serialization.loads(raw) if raw is not None else None
+
+
+async def read_through_json(key: str, loader):
+    """
+    與 read_through 相同，但回傳已編碼的 JSON bytes：快取命中時不需解碼再編碼，可直接放進回應。
+    loader 回傳 None 時回傳 None。
+    """
+    if READ_CACHE_TTL <= 0:
+        value = await loader()
+        return serialization.dumps(value) if value is not None else None
+
+    redis_conn = get_async_redis()
+    try:
+        cached = await redis_conn.get(key)
+        if cached is not None:
+            return cached.encode() if isinstance(cached, str) else cached
+    except RedisError as e:
+        logger.warning(f"Read cache unavailable for {key}: {e}")
+        value = await loader()
+        return serialization.dumps(value) if value is not None else None
+
+    value = await loader()
+    if value is None:
+        return None
+    raw = serialization.dumps(value)
+    try:
+        await redis_conn.set(key, raw, ex=READ_CACHE_TTL)
+    except RedisError as e:
+        logger.warning(f"Failed to populate read cache for {key}: {e}")
+    return raw
+
+
+def invalidate(redis_conn: Redis, *keys: str):
+    """
+    寫入後清除相關快取 (由 Celery 任務呼叫)
+    """
+    try:
+        redis_conn.delete(*keys)
+    except RedisError as e:
+        logger.warning(f"Failed to invalidate read cache {keys}: {e}")
@@ -0,0 +1,118 @@
+import os
+import secrets
+import logging
+from typing import Optional
+from fastapi import Response
+from redis import Redis
+from redis.exceptions import RedisError
+
+from database import READ_YOUR_WRITES_SECONDS
+from redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# 版本號存活秒數 (每次遞增時延長)；過期後不回傳 ETag，直到下一次寫入以新的隨機起始值重建，舊的 ETag 不會誤判為未變更
+RESOURCE_VERSION_TTL = int(os.getenv("RESOURCE_VERSION_TTL", 7 * 24 * 3600))
+# 要求瀏覽器每次都帶 If-None-Match 重新驗證
+CACHE_CONTROL = "no-cache"
+
+# 每個活動一個版本號：活動、隊伍、打卡、分數寫入時遞增
+EVENT_VERSION_KEY = "version:event:{event_id}"
+# 活動列表的版本號：新增活動時遞增
+EVENTS_VERSION_KEY = "version:events"
+
+
+def event_version_key(event_id: int) -> str:
+    return EVENT_VERSION_KEY.format(event_id=event_id)
+
+
+def _recent_key(key: str) -> str:
+    # 遞增後 READ_YOUR_WRITES_SECONDS 秒內存在：讀取改走 primary，避免把 replica 的舊資料配上新的 ETag
+    return f"{key}:recent"
+
+
+def queue_bump(pipe, key: str):
+    """
+    將遞增版本號的指令加入 pipeline (可與資料寫入放在同一個 MULTI)。
+    不存在時先設為隨機起始值，避免 Redis 資料遺失後版本號從頭計數而與舊 ETag 相同。
+    """
+    pipe.set(key, secrets.randbits(48), nx=True, ex=RESOURCE_VERSION_TTL)
+    pipe.incr(key)
+    pipe.expire(key, RESOURCE_VERSION_TTL)
+    if READ_YOUR_WRITES_SECONDS > 0:
+        pipe.set(_recent_key(key), 1, ex=READ_YOUR_WRITES_SECONDS)
+
+
+def bump(redis_conn: Redis, event_ids=(), events: bool = False):
+    """
+    寫入後遞增相關活動 (與活動列表) 的版本號，一次 round trip (由 Celery 任務呼叫)
+    """
+    keys = [event_version_key(event_id) for event_id in dict.fromkeys(event_ids) if event_id is not None]
+    if events:
+        keys.append(EVENTS_VERSION_KEY)
+    if not keys:
+        return
+    try:
+        pipe = redis_conn.pipeline(transaction=False)
+        for key in keys:
+            queue_bump(pipe, key)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to bump resource versions {keys}: {e}")
+
+
+def _etag(name: str, version) -> Optional[str]:
+    return f'"{name}-{version}"' if version is not None else None
+
+
+def current_etag(redis_conn: Redis, name: str, key: str):
+    """
+    依版本號產生 strong ETag，回傳 (etag, 是否剛寫入過)。
+    讀取不建立版本號 (否則任意 event id 都會留下 key)：尚未有寫入建立版本號時不回傳 ETag。
+    Redis 故障時回傳 (None, True)：照常回傳完整內容並從 primary 讀取
+    """
+    try:
+        pipe = redis_conn.pipeline(transaction=False)
+        pipe.get(key)
+        pipe.exists(_recent_key(key))
+        version, recent = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Resource version unavailable for {key}: {e}")
+        return None, True
+    return _etag(name, version), bool(recent)
+
+
+async def current_etag_async(name: str, key: str):
+    try:
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.exists(_recent_key(key))
+            version, recent = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Resource version unavailable for {key}: {e}")
+        return None, True
+    return _etag(name, version), bool(recent)
+
+
+def matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    """
+    If-None-Match 是否包含目前的 ETag (依 RFC 7232 使用弱比較)
+    """
+    if not if_none_match or etag is None:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or (tag[2:] if tag.startswith("W/") else tag) == etag:
+            return True
+    return False
+
+
+def headers(etag: Optional[str]) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag is not None else {}
+
+
+def not_modified(etag: str) -> Response:
+    """
+    304 回應：只有標頭，不查資料庫也不編碼內容
+    """
+    return Response(status_code=304, headers=headers(etag))
@@ -1,69 +1,112 @@
 from sqlalchemy.orm import Session
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
+from sqlalchemy.dialects.postgresql import insert
 from redis import Redis
 from models import Checkin, User, user_teams, Score
-from datetime import datetime, timedelta
+from . import team_stats
+from datetime import datetime, timedelta, timezone
 import time
 
 # 參數設定
 ALPHA = 0.05  # 時間差權重調整因子
 BETA = 10    # 新會員數量權重調整因子
 
-def calculate_team_score(team_id: int, db: Session):
+# 計分所需的統計值由 team_stats 增量維護 (見 services/team_stats.py)，計分只讀取一列:
+# 權重總和 (每筆打卡 1 / 該成員所屬隊伍數)、打卡筆數、最早 / 最晚打卡時間與新會員數，
+# 以及手動調整分數時記錄的差值 (scores.adjustment，見 set_team_scores)。
+# version 在每次統計值或手動調整變更時遞增 (team_stats_version_seq)，用來判斷哪個計算結果較新
+TEAM_SCORE_STATS_SQL = text("""
+    SELECT
+        COALESCE(ts.total_weight, 0) AS total_weight,
+        COALESCE(ts.checkin_count, 0) AS checkin_count,
+        ts.first_checkin_at,
+        ts.last_checkin_at,
+        COALESCE(ts.new_members, 0) AS new_members,
+        COALESCE(s.adjustment, 0) AS adjustment,
+        COALESCE(ts.version, 0) AS version
+    FROM (SELECT CAST(:team_id AS INTEGER) AS team_id) t
+    LEFT JOIN team_stats ts ON ts.team_id = t.team_id
+    LEFT JOIN scores s ON s.team_id = t.team_id
+""")
+
+
+def fetch_team_score_stats(team_id: int, db: Session):
     """
-    計算指定團隊的分數
+    讀取指定團隊的計分統計值 (O(1)，不掃描打卡紀錄)
     """
-    
-    checkin_members = db.query(Checkin.user_id).filter(Checkin.team_id == team_id).all()
-    user_ids = [c[0] for c in checkin_members]
+    return db.execute(TEAM_SCORE_STATS_SQL, {"team_id": team_id}).one()
 
-    # 計算每個 user_id 的權重 (T)
-    user_weights = {}
-    for user_id in user_ids:
-        # 計算該成員所屬的隊伍數量
-        team_count = db.query(func.count(user_teams.c.team_id)).filter(user_teams.c.user_id == user_id).scalar()
-        user_weights[user_id] = 1 / team_count
 
+def _stats_score(stats) -> float:
+    """
+    由統計值算出的分數 (未四捨五入，不含手動調整)
+    """
     # 計算總權重 T
-    total_weight = sum(user_weights[user_id] for user_id in user_ids)
+    total_weight = float(stats.total_weight)
 
     # 計算時間差 (S)
-    checkins = db.query(Checkin.created_at).filter(Checkin.team_id == team_id).all()
-    if len(checkins) < 2:
+    if stats.checkin_count < 2:
         time_difference = 0  # 若不足 2 人打卡，時間差設為 0
     else:
-        times = [c[0] for c in checkins]
-        time_difference = (max(times) - min(times)).total_seconds() / 60
+        time_difference = (stats.last_checkin_at - stats.first_checkin_at).total_seconds() / 60
 
-    # 計算新會員數量 (N)
-    first_checkin_time = db.query(func.min(Checkin.created_at)).filter(Checkin.team_id == team_id).scalar()
-    if first_checkin_time is None:
-        new_members = 0  # 如果沒有打卡記錄，則新成員數量為 0
-    else:
-        new_members = db.query(User.id).join(user_teams, User.id == user_teams.c.user_id).filter(
-            user_teams.c.team_id == team_id,
-            User.created_at > first_checkin_time
-        ).count()
-
-    # 從 PostgreSQL 獲取當前的分數並計算新的分數
-    current_score = db.query(Score.score).filter(Score.team_id == team_id).first()
-    if current_score is None:
-        current_score = 0  # 如果沒有紀錄，則設定為 0
-    else:
-        current_score = current_score[0]  # 從返回的元組中提取分數
+    # 計算新會員數量 (N)，沒有打卡記錄時為 0
+    new_members = stats.new_members
+
+    # 計算分數
+    return total_weight / (ALPHA * (time_difference + 1)) + BETA * new_members
+
+
+def score_team(team_id: int, db: Session):
+    """
+    計算指定團隊的分數，回傳 (分數, 統計值版本)。
+    分數由 team_stats 的完整統計值算出再加上手動調整的差值 (不以目前分數為基準累加)，同樣的資料重算多次結果相同。
+    """
+    stats = fetch_team_score_stats(team_id, db)
+    base_score = _stats_score(stats)
+    score = round(base_score + stats.adjustment, 0)  # 四捨五入到整數
+
+    # 印出計算結果
+    print(f"Team {team_id} score calculation: 統計分數 {base_score} + 手動調整 {stats.adjustment} = {score}")
 
+    return score, stats.version
 
-    # 計算新的分數
-    score = total_weight / (ALPHA * (time_difference + 1)) + BETA * new_members
-    score = round(score, 0)  # 四捨五入到整數
-    new_total_score = current_score + score 
 
-    # 印出計算公式
-    print(f"Team {team_id} score calculation: 人數{total_weight} / ({ALPHA} * ({time_difference} + 1)) + {BETA} * {new_members} = {score}")
-    print(f"Previous score: {current_score}, New score: {new_total_score}")
-    
-    # 返回最終累積的分數
-    return round(new_total_score, 0)
+def calculate_team_score(team_id: int, db: Session):
+    """
+    計算指定團隊的分數
+    """
+    return score_team(team_id, db)[0]
+
+
+def set_team_scores(db: Session, values: dict):
+    """
+    手動設定分數 (team_id -> score，/api/score/update)：記錄與統計值算出分數的差值 (scores.adjustment)，
+    之後重算時加回，手動調整不會被下一次重算覆蓋 (不 commit)
+    """
+    if not values:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    statement = insert(Score).values([
+        {
+            "team_id": team_id,
+            "score": value,
+            "adjustment": value - _stats_score(fetch_team_score_stats(team_id, db)),
+            "updated_at": now,
+        }
+        for team_id, value in values.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[Score.team_id],
+        set_={
+            "score": statement.excluded.score,
+            "adjustment": statement.excluded.adjustment,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    db.execute(statement)
+    # 手動調整也是一次變更：遞增版本，較早開始的重算不會蓋掉新的分數
+    db.execute(team_stats.BUMP_VERSION_SQL, {"team_ids": list(values)})
 
 def sync_scores_to_postgres(team_id: int, score: float, db: Session):
     """
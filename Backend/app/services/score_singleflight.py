@@ -0,0 +1,77 @@
+import os
+import uuid
+from redis import Redis
+
+# 分數快取與單一飛行 (single-flight) 相關的 key
+SCORE_CACHE_KEY = "team:{team_id}:score"
+# 進行中的計算：值為負責計算的 task id，附帶 lease 到期時間
+INFLIGHT_KEY = "team:{team_id}:score:inflight"
+# 最近一次計算完成的標記，存活時間即最小重算間隔
+RECENT_KEY = "team:{team_id}:score:recent"
+
+SCORE_LEASE_SECONDS = int(os.getenv("SCORE_LEASE_SECONDS", 120))
+SCORE_MIN_RECOMPUTE_INTERVAL = float(os.getenv("SCORE_MIN_RECOMPUTE_INTERVAL", 5))
+
+# 只有 lease 仍屬於自己時才刪除，避免誤刪下一個計算的 lease
+_RELEASE_LEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _key(template: str, team_id: int) -> str:
+    return template.format(team_id=team_id)
+
+
+def _dispatch(redis_conn: Redis, team_id: int):
+    """
+    嘗試取得 lease 並送出計算任務；回傳 (task_id, 是否為新任務)
+    """
+    from tasks import calculate_team_score_task
+
+    task_id = str(uuid.uuid4())
+    if redis_conn.set(_key(INFLIGHT_KEY, team_id), task_id, nx=True, ex=SCORE_LEASE_SECONDS):
+        # 距離上次計算未滿最小間隔時延後執行
+        remaining_ms = redis_conn.pttl(_key(RECENT_KEY, team_id))
+        countdown = remaining_ms / 1000 if remaining_ms and remaining_ms > 0 else None
+        calculate_team_score_task.apply_async(args=[team_id], task_id=task_id, countdown=countdown)
+        return task_id, True
+
+    existing = redis_conn.get(_key(INFLIGHT_KEY, team_id))
+    if existing is None:
+        # lease 剛好釋放，重試一次
+        return _dispatch(redis_conn, team_id)
+    return existing, False
+
+
+def get_or_compute(redis_conn: Redis, team_id: int) -> dict:
+    """
+    讀取隊伍分數：有快取直接回傳，否則附加到進行中的計算或發起新的計算
+    """
+    pipe = redis_conn.pipeline(transaction=False)
+    pipe.get(_key(SCORE_CACHE_KEY, team_id))
+    pipe.get(_key(INFLIGHT_KEY, team_id))
+    score, inflight = pipe.execute()
+
+    if score is not None:
+        return {"score": float(score)}
+    if inflight is not None:
+        return {"task_id": inflight, "coalesced": True}
+
+    task_id, created = _dispatch(redis_conn, team_id)
+    return {"task_id": task_id, "coalesced": not created}
+
+
+def complete(redis_conn: Redis, team_id: int, task_id: str):
+    """
+    計算完成：記錄最小重算間隔並釋放 lease (打卡後的重算由計分 consumer 負責)
+    """
+    if SCORE_MIN_RECOMPUTE_INTERVAL > 0:
+        redis_conn.set(_key(RECENT_KEY, team_id), 1, px=int(SCORE_MIN_RECOMPUTE_INTERVAL * 1000))
+    release(redis_conn, team_id, task_id)
+
+
+def release(redis_conn: Redis, team_id: int, task_id: str):
+    redis_conn.eval(_RELEASE_LEASE_SCRIPT, 1, _key(INFLIGHT_KEY, team_id), task_id)
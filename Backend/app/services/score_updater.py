@@ -1,67 +1,164 @@
-from database import get_postgresql_connection
-from .score_service import calculate_team_score, sync_scores_to_postgres
-from redis import Redis
+import os
+import time
+import socket
 import logging
+from redis import Redis
 from sqlalchemy.orm import Session
+
+from database import get_synchronous_session
+from redis_client import get_redis
 from models import Team
+from . import leaderboard, score_writer
+from .score_service import score_team
+from .checkin_stream import (
+    CHECKIN_STREAM_KEY,
+    CHECKIN_DEAD_LETTER_KEY,
+    SCORER_GROUP,
+    ensure_group,
+)
 
 # 設置日誌
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
-
-
-# def subscribe_and_sync_scores():
-#     """
-#     監聽 Redis 訊息，更新 Redis 並同步到 PostgreSQL
-#     """
-#     try:
-#         pubsub = redis_conn.pubsub()
-#         pubsub.subscribe("team_checkin_channel")
-#         logger.info("Subscribed to Redis channel: team_checkin_channel")
-
-#         # 持久化的 PostgreSQL 連接
-#         db: Session = next(get_postgresql_connection())  # 保持一個資料庫連接
-
-#         for message in pubsub.listen():
-#             if message["type"] == "message":
-#                 try:
-#                     team_id = int(message["data"])
-#                     logger.info(f"Received update for team {team_id}")
-
-#                     # 計算分數
-#                     score = calculate_team_score(team_id, db, redis_conn)
-#                     logger.info(f"Calculated score for team {team_id}: {score}")
-
-#                     # 更新 Redis 快取
-#                     redis_conn.set(f"team:{team_id}:score", score, ex=3600)  # 設置 1 小時過期時間
-#                     logger.info("Updated Redis cache for team {} with score {}".format(team_id, str(score)))
-
-#                     # 同步到 PostgreSQL
-#                     sync_scores_to_postgres(team_id, score, db)
-#                     logger.info(f"Synced score for team {team_id} to PostgreSQL")
-
-#                 except Exception as e:
-#                     logger.error(f"Error processing team {team_id}: {str(e)}")
-
-#     except Exception as e:
-#         logger.error(f"Error in Redis subscription: {str(e)}")
-        
-# def startup_sync_scores():
-#     """
-#     初始化時同步所有團隊的分數
-#     """
-#     db = next(get_postgresql_connection())
-#     initialize_team_scores(db)
-
-# def initialize_team_scores(db: Session):
-#     """
-#     初始化所有團隊的分數並同步到 Redis
-#     """
-#     teams = db.query(Team).all()  # 獲取所有團隊
-#     for team in teams:
-#         initial_score = 0.0  # 初始分數設為 0
-#         # 更新 Redis 快取
-#         redis_conn.set(f"team:{team.id}:score", initial_score, ex=3600)  # 設置 1 小時過期時間
-#         # 同步到 PostgreSQL
-#         sync_scores_to_postgres(team.id, initial_score, db)
-#         logger.info("Initialized score for team {} to {}".format(team.id, str(initial_score)))
+
+# 每次從事件流讀取的筆數與阻塞等待毫秒數
+SCORER_BATCH_SIZE = int(os.getenv("SCORER_BATCH_SIZE", 500))
+SCORER_BLOCK_MS = int(os.getenv("SCORER_BLOCK_MS", 5000))
+# 其他 consumer 持有超過此毫秒數未 ack 的 entry 視為該 consumer 已當機，由自己接手
+SCORER_CLAIM_IDLE_MS = int(os.getenv("SCORER_CLAIM_IDLE_MS", 60000))
+SCORER_CLAIM_INTERVAL = float(os.getenv("SCORER_CLAIM_INTERVAL", 30))
+# 投遞超過此次數仍未成功的 entry 移到 dead-letter stream
+SCORER_MAX_DELIVERIES = int(os.getenv("SCORER_MAX_DELIVERIES", 5))
+
+SCORE_CACHE_KEY = "team:{team_id}:score"
+# 各隊已寫入分數的統計值版本 (hash: team_id -> version)，多個 consumer 同時重算時不讓較舊的結果蓋掉較新的
+SCORE_VERSIONS_KEY = "scores:version"
+
+
+def rescore_teams(db: Session, redis_conn: Redis, team_ids: list) -> dict:
+    """
+    重新計算多個隊伍的分數：更新分數快取、待寫回分數 (write-behind) 與活動排行榜。
+    回傳 team_id -> score (不存在的隊伍略過)。
+    """
+    teams = {
+        team.id: team
+        for team in db.query(Team.id, Team.event_id, Team.name).filter(Team.id.in_(team_ids)).all()
+    }
+    # 分數由 team_stats 完整算出，不以待寫回或目前的分數為基準
+    results = {team_id: score_team(team_id, db) for team_id in teams}
+    if results:
+        _write_scores(redis_conn, teams, results)
+    return {team_id: score for team_id, (score, _) in results.items()}
+
+
+def _write_scores(redis_conn: Redis, teams: dict, results: dict):
+    """
+    只寫入統計值版本不比已寫入者舊的分數 (results: team_id -> (score, version))。
+    WATCH 版本 hash 後比對，分數快取、待寫回分數、排行榜與版本在同一個 MULTI 中寫入；
+    期間有其他 consumer 寫入時重新比對。
+    """
+    team_ids = list(results)
+
+    def write(pipe):
+        stored = pipe.hmget(SCORE_VERSIONS_KEY, team_ids)
+        scores = {
+            team_id: results[team_id][0]
+            for team_id, version in zip(team_ids, stored)
+            if version is None or results[team_id][1] >= int(version)
+        }
+        pipe.multi()
+        if not scores:
+            return
+        pipe.hset(SCORE_VERSIONS_KEY, mapping={team_id: results[team_id][1] for team_id in scores})
+        for team_id, score in scores.items():
+            pipe.set(SCORE_CACHE_KEY.format(team_id=team_id), score, ex=3600)  # Cache for 1 hour
+        score_writer.record_scores(pipe, scores)
+        leaderboard.queue_team_scores(pipe, [
+            (teams[team_id].event_id, team_id, score, teams[team_id].name) for team_id, score in scores.items()
+        ])
+
+    redis_conn.transaction(write, SCORE_VERSIONS_KEY)
+
+
+def process_entries(redis_conn: Redis, entries: list) -> int:
+    """
+    處理一批事件流 entry：每個受影響的隊伍只重算一次，完成後 ack。
+    分數由資料庫完整狀態算出 (絕對值)，批次如何切分或 entry 重新投遞都不影響結果。
+    回傳重算的隊伍數。
+    """
+    team_ids = list(dict.fromkeys(int(fields["team_id"]) for _, fields in entries))
+
+    if team_ids:
+        db_gen = get_synchronous_session()
+        db = next(db_gen)
+        try:
+            rescore_teams(db, redis_conn, team_ids)
+        finally:
+            db.close()
+
+    redis_conn.xack(CHECKIN_STREAM_KEY, SCORER_GROUP, *[entry_id for entry_id, _ in entries])
+    return len(team_ids)
+
+
+def _dead_letter(redis_conn: Redis, entry_id: str):
+    entries = redis_conn.xrange(CHECKIN_STREAM_KEY, entry_id, entry_id)
+    pipe = redis_conn.pipeline()
+    if entries:
+        pipe.xadd(CHECKIN_DEAD_LETTER_KEY, dict(entries[0][1], entry_id=entry_id))
+    pipe.xack(CHECKIN_STREAM_KEY, SCORER_GROUP, entry_id)
+    pipe.execute()
+    logger.error(f"Moved check-in stream entry {entry_id} to {CHECKIN_DEAD_LETTER_KEY}")
+
+
+def reclaim_pending(redis_conn: Redis, consumer: str) -> list:
+    """
+    接手閒置過久的 pending entry (原 consumer 當機或處理失敗)，投遞次數過多者移到 dead-letter
+    """
+    stale = redis_conn.xpending_range(
+        CHECKIN_STREAM_KEY, SCORER_GROUP, min="-", max="+",
+        count=SCORER_BATCH_SIZE, idle=SCORER_CLAIM_IDLE_MS,
+    )
+    for entry in stale:
+        if entry["times_delivered"] >= SCORER_MAX_DELIVERIES:
+            _dead_letter(redis_conn, entry["message_id"])
+
+    claimed = redis_conn.xautoclaim(
+        CHECKIN_STREAM_KEY, SCORER_GROUP, consumer, SCORER_CLAIM_IDLE_MS,
+        start_id="0-0", count=SCORER_BATCH_SIZE,
+    )[1]
+    # 已被 MAXLEN 修剪掉的 entry 沒有內容，直接 ack
+    trimmed = [entry_id for entry_id, fields in claimed if not fields]
+    if trimmed:
+        redis_conn.xack(CHECKIN_STREAM_KEY, SCORER_GROUP, *trimmed)
+    return [(entry_id, fields) for entry_id, fields in claimed if fields]
+
+
+def run(consumer: str = None):
+    """
+    計分 consumer 主迴圈，可在多個行程 / 主機同時執行 (同一個 consumer group 分攤 entry)
+    """
+    consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+    redis_conn = get_redis()
+    ensure_group(redis_conn)
+    logger.info(f"Scorer {consumer} consuming {CHECKIN_STREAM_KEY} as group {SCORER_GROUP}")
+
+    last_claim = 0.0
+    while True:
+        try:
+            if time.monotonic() - last_claim >= SCORER_CLAIM_INTERVAL:
+                last_claim = time.monotonic()
+                claimed = reclaim_pending(redis_conn, consumer)
+                if claimed:
+                    rescored = process_entries(redis_conn, claimed)
+                    logger.info(f"Recovered {len(claimed)} pending check-ins, rescored {rescored} teams")
+
+            response = redis_conn.xreadgroup(
+                SCORER_GROUP, consumer, {CHECKIN_STREAM_KEY: ">"},
+                count=SCORER_BATCH_SIZE, block=SCORER_BLOCK_MS,
+            )
+            for _, entries in response or []:
+                rescored = process_entries(redis_conn, entries)
+                logger.info(f"Processed {len(entries)} check-ins, rescored {rescored} teams")
+        except Exception as e:
+            # 未 ack 的 entry 會在閒置逾時後被重新接手
+            logger.error(f"Scorer {consumer} error: {e}")
+            time.sleep(1)
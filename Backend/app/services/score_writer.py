@@ -0,0 +1,75 @@
+import os
+import logging
+from datetime import datetime, timezone
+from redis import Redis
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from models import Score
+
+logger = logging.getLogger(__name__)
+
+# 待寫入 PostgreSQL 的分數 (hash: team_id -> score)，由定期 flusher 批次寫回
+PENDING_SCORES_KEY = "scores:pending"
+
+SCORE_FLUSH_BATCH_SIZE = int(os.getenv("SCORE_FLUSH_BATCH_SIZE", 500))
+
+# 只移除已寫入且期間未再變動的欄位，flush 進行中的新分數會留到下一輪
+_ACK_FLUSHED_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        removed = removed + redis.call('HDEL', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+
+def record_scores(redis_conn: Redis, scores: dict):
+    """
+    記錄分數變更 (team_id -> score)，實際寫入由 flush_pending_scores 批次完成
+    """
+    if scores:
+        redis_conn.hset(PENDING_SCORES_KEY, mapping=scores)
+
+
+def _take_batch(redis_conn: Redis, batch_size: int) -> dict:
+    batch = {}
+    for team_id, score in redis_conn.hscan_iter(PENDING_SCORES_KEY, count=batch_size):
+        batch[team_id] = score
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+
+def flush_pending_scores(db: Session, redis_conn: Redis, batch_size: int = SCORE_FLUSH_BATCH_SIZE) -> int:
+    """
+    將待寫入的分數以 INSERT ... ON CONFLICT (team_id) DO UPDATE 批次寫回，每批一個 statement。
+    回傳寫入的隊伍數。
+    """
+    flushed = 0
+    while True:
+        batch = _take_batch(redis_conn, batch_size)
+        if not batch:
+            return flushed
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        statement = insert(Score).values([
+            {"team_id": int(team_id), "score": float(score), "updated_at": now}
+            for team_id, score in batch.items()
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[Score.team_id],
+            set_={"score": statement.excluded.score, "updated_at": statement.excluded.updated_at},
+        )
+        db.execute(statement)
+        db.commit()
+
+        args = [value for item in batch.items() for value in item]
+        redis_conn.eval(_ACK_FLUSHED_SCRIPT, 1, PENDING_SCORES_KEY, *args)
+        flushed += len(batch)
+        logger.info(f"Flushed {len(batch)} team scores to PostgreSQL")
+
+        if len(batch) < batch_size:
+            return flushed
@@ -0,0 +1,49 @@
+import orjson
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.engine import Row, RowMapping
+
+
+def _default(obj):
+    # SQLAlchemy 2.0 的 Row / RowMapping 不是 dict，直接轉成欄位名稱 -> 值
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    """
+    以 orjson 編碼 (datetime 直接輸出 ISO 8601，SQLAlchemy Row 依欄位名稱輸出)
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(content):
+    return orjson.loads(content)
+
+
+class RowJSONResponse(ORJSONResponse):
+    """
+    直接回傳此 Response 可略過 FastAPI 的 jsonable_encoder，SQLAlchemy Row 直接編碼成 bytes
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class RawJSONResponse(ORJSONResponse):
+    """
+    內容已是 JSON bytes (例如 Redis 快取) 時原樣回傳
+    """
+
+    def render(self, content) -> bytes:
+        return content
+
+
+def embed(prefix: dict, key: str, raw: bytes) -> bytes:
+    """
+    將已編碼的 JSON 值放進物件的最後一個欄位，不需解碼再編碼：{...prefix, key: raw}
+    """
+    head = dumps(dict(prefix, **{key: None}))
+    return head[:-len(b"null}")] + raw + b"}"
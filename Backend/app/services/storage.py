@@ -0,0 +1,83 @@
+import os
+import uuid
+import aiofiles
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+# 每次讀寫的區塊大小，照片不會整個載入記憶體
+CHUNK_SIZE = 1024 * 1024
+
+PHOTO_PREFIX = "checkin_photos"
+
+
+def _photo_name(upload: UploadFile) -> str:
+    extension = os.path.splitext(upload.filename or "")[1].lower() or ".png"
+    return f"{PHOTO_PREFIX}/{uuid.uuid4()}{extension}"
+
+
+class LocalStorage:
+    """
+    開發環境：照片寫入本機檔案系統
+    """
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+
+    async def save(self, upload: UploadFile) -> str:
+        file_name = _photo_name(upload)
+        path = os.path.join(self.base_dir, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        async with aiofiles.open(path, "wb") as f:
+            while chunk := await upload.read(CHUNK_SIZE):
+                await f.write(chunk)
+        return f"file://{path}"
+
+
+class GCSStorage:
+    """
+    正式環境：照片以 resumable upload 分段串流到 GCP Cloud Storage
+    """
+
+    def __init__(self, bucket_name: str):
+        self.bucket_name = bucket_name
+        self._bucket = None
+
+    def _get_bucket(self):
+        if self._bucket is None:
+            from google.cloud import storage
+            self._bucket = storage.Client().bucket(self.bucket_name)
+        return self._bucket
+
+    def _write(self, upload: UploadFile, file_name: str):
+        blob = self._get_bucket().blob(file_name)
+        content_type = upload.content_type or "image/png"
+        with blob.open("wb", content_type=content_type, chunk_size=CHUNK_SIZE * 8) as f:
+            while chunk := upload.file.read(CHUNK_SIZE):
+                f.write(chunk)
+
+    async def save(self, upload: UploadFile) -> str:
+        file_name = _photo_name(upload)
+        # google-cloud-storage 為同步 API，放到 threadpool 執行
+        await run_in_threadpool(self._write, upload, file_name)
+        return f"https://storage.googleapis.com/{self.bucket_name}/{file_name}"
+
+
+_storage = None
+
+
+def get_storage():
+    """
+    依 ENV 選擇儲存後端 (dev 使用本機檔案，其餘使用 GCP Cloud Storage)
+    """
+    global _storage
+    if _storage is None:
+        env = os.getenv("ENV", "dev").lower()
+        if env == "dev":
+            _storage = LocalStorage(os.getenv("LOCAL_UPLOAD_DIR", "/tmp"))
+        else:
+            bucket_name = os.getenv("GCP_BUCKET_NAME")
+            if not bucket_name:
+                raise RuntimeError("GCP_BUCKET_NAME not set.")
+            _storage = GCSStorage(bucket_name)
+    return _storage
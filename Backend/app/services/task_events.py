@@ -0,0 +1,79 @@
+import asyncio
+import time
+from celery import states
+from redis import Redis
+
+from redis_client import get_async_pubsub_redis
+
+# Worker 在任務結束時發佈到此頻道，等待中的 API 請求即可立刻回應
+TASK_DONE_CHANNEL = "task:{task_id}:done"
+
+# 長輪詢 / SSE 的等待上限 (SSE 到期後關閉，未知或結果已過期的 task id 會一直是 PENDING)
+MAX_WAIT_SECONDS = 30
+SSE_HEARTBEAT_SECONDS = 15
+
+
+def task_done_channel(task_id: str) -> str:
+    return TASK_DONE_CHANNEL.format(task_id=task_id)
+
+
+def publish_task_done(redis_conn: Redis, task_id: str, state: str):
+    """
+    通知訂閱者任務狀態已改變 (由 worker 的 task_postrun signal 呼叫)
+    """
+    redis_conn.publish(task_done_channel(task_id), state)
+
+
+def parse_wait(value: str) -> float:
+    """
+    解析 ?wait= 參數，支援 "5s"、"500ms" 或純數字 (秒)，上限為 MAX_WAIT_SECONDS
+    """
+    value = value.strip().lower()
+    if value.endswith("ms"):
+        seconds = float(value[:-2]) / 1000
+    elif value.endswith("s"):
+        seconds = float(value[:-1])
+    else:
+        seconds = float(value)
+    if seconds < 0:
+        raise ValueError("wait must not be negative")
+    return min(seconds, MAX_WAIT_SECONDS)
+
+
+async def subscribe_task(task_id: str):
+    """
+    訂閱任務完成頻道；須在檢查任務狀態之前訂閱，避免錯過通知。
+    使用訂閱專用連線池，連線用完時 (等待 REDIS_POOL_TIMEOUT 後) 拋出 RedisError
+    """
+    pubsub = get_async_pubsub_redis().pubsub()
+    await pubsub.subscribe(task_done_channel(task_id))
+    return pubsub
+
+
+async def wait_for_notification(pubsub, timeout: float) -> bool:
+    """
+    等待下一則任務通知，逾時回傳 False
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        try:
+            message = await asyncio.wait_for(
+                pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining),
+                timeout=remaining + 1,
+            )
+        except asyncio.TimeoutError:
+            return False
+        if message and message["type"] == "message":
+            return True
+
+
+async def close_subscription(pubsub):
+    await pubsub.unsubscribe()
+    await pubsub.close()
+
+
+def is_terminal(state: str) -> bool:
+    return state in states.READY_STATES
@@ -0,0 +1,56 @@
+from sqlalchemy.sql import text
+from sqlalchemy.orm import Session
+
+from . import team_stats
+
+# 單一 statement 加入隊伍：隊伍必須屬於該活動、使用者必須存在，已是成員者略過 (ON CONFLICT DO NOTHING)，
+# 只回傳實際新增的配對
+JOIN_TEAMS_SQL = text("""
+    INSERT INTO user_teams (user_id, team_id)
+    SELECT DISTINCT p.user_id, p.team_id
+    FROM unnest(CAST(:user_ids AS INTEGER[]), CAST(:team_ids AS INTEGER[])) AS p(user_id, team_id)
+    JOIN teams t ON t.id = p.team_id AND t.event_id = :event_id
+    JOIN users u ON u.id = p.user_id
+    ON CONFLICT (user_id, team_id) DO NOTHING
+    RETURNING user_id, team_id
+""")
+
+# 加入失敗時 (只在失敗路徑執行) 判斷原因
+JOIN_FAILURE_SQL = text("""
+    SELECT
+        EXISTS (SELECT 1 FROM events WHERE id = :event_id) AS event_exists,
+        EXISTS (SELECT 1 FROM teams WHERE id = :team_id AND event_id = :event_id) AS team_in_event,
+        EXISTS (SELECT 1 FROM users WHERE id = :user_id) AS user_exists
+""")
+
+
+def join_teams(db: Session, event_id: int, pairs: list) -> list:
+    """
+    將多個 (user_id, team_id) 以單一 INSERT ... SELECT ... ON CONFLICT DO NOTHING RETURNING 加入隊伍，
+    並在同一個交易中更新 team_stats (不 commit)。回傳實際新增的 (user_id, team_id)。
+    """
+    if not pairs:
+        return []
+    rows = db.execute(JOIN_TEAMS_SQL, {
+        "event_id": event_id,
+        "user_ids": [user_id for user_id, _ in pairs],
+        "team_ids": [team_id for _, team_id in pairs],
+    }).all()
+
+    joined = [(row.user_id, row.team_id) for row in rows]
+    team_stats.record_joins(db, joined)
+    return joined
+
+
+def explain_join_failure(db: Session, event_id: int, user_id: int, team_id: int) -> str:
+    """
+    單筆加入沒有新增資料時的原因
+    """
+    row = db.execute(JOIN_FAILURE_SQL, {"event_id": event_id, "user_id": user_id, "team_id": team_id}).one()
+    if not row.event_exists:
+        return "Event not found"
+    if not row.team_in_event:
+        return "Team not found or not associated with this event"
+    if not row.user_exists:
+        return "User not found"
+    return "User already in this team"
@@ -0,0 +1,240 @@
+from sqlalchemy.sql import text
+from sqlalchemy.orm import Session
+
+# team_stats 保存計分所需的統計值，在打卡 / 加入隊伍的同一個交易中增量更新，
+# 計分時只需讀取一列 (見 score_service.calculate_team_score)。
+# 每筆打卡的權重為 1 / 打卡者所屬隊伍數 (不屬於任何隊伍時為 0)。
+# 每次更新都從 team_stats_version_seq 取新的 version：同一列的更新受列鎖依序進行，
+# 較晚 commit 的更新一定拿到較大的 version，計分 consumer 以此丟棄較舊的計算結果。
+
+# 權重取決於使用者的所屬隊伍數，同一個使用者的打卡與加入隊伍必須依序計算：
+# 寫入 checkins / user_teams 後、計算差值前先鎖住相關使用者，後到的交易等前一個 commit 後
+# 以新的 statement snapshot 看到對方的資料 (READ COMMITTED)，不會各自用舊的隊伍數計算。
+# 使用 FOR NO KEY UPDATE：不與外鍵檢查的 KEY SHARE 鎖衝突，插入 checkins / user_teams 時不會互相死結。
+LOCK_CHECKIN_USERS_SQL = text("""
+    SELECT id FROM users
+    WHERE id IN (SELECT user_id FROM checkins WHERE id = ANY(:checkin_ids))
+    ORDER BY id
+    FOR NO KEY UPDATE
+""")
+LOCK_USERS_SQL = text("""
+    SELECT id FROM users
+    WHERE id = ANY(:user_ids)
+    ORDER BY id
+    FOR NO KEY UPDATE
+""")
+
+# 新打卡：累加筆數與權重、更新最早 / 最晚時間；最早時間改變時重新計算新會員數
+RECORD_CHECKINS_SQL = text("""
+    WITH new_checkins AS (
+        SELECT team_id, user_id, created_at
+        FROM checkins
+        WHERE id = ANY(:checkin_ids)
+    ),
+    membership AS (
+        SELECT user_id, COUNT(*) AS team_count
+        FROM user_teams
+        WHERE user_id IN (SELECT DISTINCT user_id FROM new_checkins)
+        GROUP BY user_id
+    ),
+    batch AS (
+        SELECT
+            nc.team_id,
+            COUNT(*) AS checkin_count,
+            COALESCE(SUM(1.0 / m.team_count), 0) AS total_weight,
+            MIN(nc.created_at) AS first_checkin_at,
+            MAX(nc.created_at) AS last_checkin_at
+        FROM new_checkins nc
+        LEFT JOIN membership m ON m.user_id = nc.user_id
+        GROUP BY nc.team_id
+    )
+    INSERT INTO team_stats (team_id, checkin_count, total_weight, first_checkin_at, last_checkin_at, new_members)
+    SELECT
+        b.team_id,
+        b.checkin_count,
+        b.total_weight,
+        b.first_checkin_at,
+        b.last_checkin_at,
+        CASE
+            WHEN EXISTS (
+                SELECT 1 FROM team_stats s
+                WHERE s.team_id = b.team_id AND s.first_checkin_at <= b.first_checkin_at
+            ) THEN 0
+            ELSE (
+                SELECT COUNT(*)
+                FROM user_teams ut
+                JOIN users u ON u.id = ut.user_id
+                WHERE ut.team_id = b.team_id
+                  AND u.created_at > b.first_checkin_at
+            )
+        END
+    FROM batch b
+    ON CONFLICT (team_id) DO UPDATE SET
+        checkin_count = team_stats.checkin_count + EXCLUDED.checkin_count,
+        total_weight = team_stats.total_weight + EXCLUDED.total_weight,
+        first_checkin_at = LEAST(team_stats.first_checkin_at, EXCLUDED.first_checkin_at),
+        last_checkin_at = GREATEST(team_stats.last_checkin_at, EXCLUDED.last_checkin_at),
+        new_members = CASE
+            WHEN team_stats.first_checkin_at IS NULL OR EXCLUDED.first_checkin_at < team_stats.first_checkin_at
+                THEN EXCLUDED.new_members
+            ELSE team_stats.new_members
+        END,
+        version = nextval('team_stats_version_seq')
+""")
+
+# 加入隊伍 (user_teams 已插入)：每個使用者新加入 j 隊、所屬隊伍數由 k-j 變為 k，
+# 其在各隊的打卡權重由 1/(k-j) 調整為 1/k (k-j 為 0 時原權重為 0)
+RECORD_JOINS_WEIGHT_SQL = text("""
+    WITH joined AS (
+        SELECT user_id, COUNT(*) AS joined_count
+        FROM unnest(CAST(:user_ids AS INTEGER[])) AS j(user_id)
+        GROUP BY user_id
+    ),
+    membership AS (
+        SELECT j.user_id, j.joined_count, COUNT(ut.team_id) AS team_count
+        FROM joined j
+        JOIN user_teams ut ON ut.user_id = j.user_id
+        GROUP BY j.user_id, j.joined_count
+    ),
+    weight_delta AS (
+        SELECT
+            c.team_id,
+            SUM(
+                1.0 / m.team_count
+                - CASE WHEN m.team_count > m.joined_count THEN 1.0 / (m.team_count - m.joined_count) ELSE 0 END
+            ) AS delta
+        FROM checkins c
+        JOIN membership m ON m.user_id = c.user_id
+        GROUP BY c.team_id
+    )
+    UPDATE team_stats ts
+    SET total_weight = ts.total_weight + wd.delta, version = nextval('team_stats_version_seq')
+    FROM weight_delta wd
+    WHERE ts.team_id = wd.team_id
+""")
+
+# 加入隊伍：註冊時間晚於該隊第一次打卡的成員計入新會員數
+RECORD_JOINS_NEW_MEMBERS_SQL = text("""
+    WITH joined AS (
+        SELECT j.team_id, COUNT(*) AS new_members
+        FROM unnest(CAST(:user_ids AS INTEGER[]), CAST(:team_ids AS INTEGER[])) AS j(user_id, team_id)
+        JOIN users u ON u.id = j.user_id
+        JOIN team_stats s ON s.team_id = j.team_id
+        WHERE u.created_at > s.first_checkin_at
+        GROUP BY j.team_id
+    )
+    UPDATE team_stats ts
+    SET new_members = ts.new_members + joined.new_members, version = nextval('team_stats_version_seq')
+    FROM joined
+    WHERE ts.team_id = joined.team_id
+""")
+
+# 手動調整分數 (scores.adjustment) 時遞增版本
+BUMP_VERSION_SQL = text("""
+    UPDATE team_stats
+    SET version = nextval('team_stats_version_seq')
+    WHERE team_id = ANY(:team_ids)
+""")
+
+# 由 checkins / user_teams 原始資料重新計算所有隊伍的統計值
+EXPECTED_TEAM_STATS_SQL = """
+    WITH membership AS (
+        SELECT user_id, COUNT(*) AS team_count
+        FROM user_teams
+        GROUP BY user_id
+    ),
+    checkin_stats AS (
+        SELECT
+            c.team_id,
+            COUNT(*) AS checkin_count,
+            COALESCE(SUM(1.0 / m.team_count), 0) AS total_weight,
+            MIN(c.created_at) AS first_checkin_at,
+            MAX(c.created_at) AS last_checkin_at
+        FROM checkins c
+        LEFT JOIN membership m ON m.user_id = c.user_id
+        GROUP BY c.team_id
+    )
+    SELECT
+        cs.team_id,
+        cs.checkin_count,
+        cs.total_weight,
+        cs.first_checkin_at,
+        cs.last_checkin_at,
+        (
+            SELECT COUNT(*)
+            FROM user_teams ut
+            JOIN users u ON u.id = ut.user_id
+            WHERE ut.team_id = cs.team_id
+              AND u.created_at > cs.first_checkin_at
+        ) AS new_members
+    FROM checkin_stats cs
+"""
+
+REBUILD_TEAM_STATS_SQL = text(f"""
+    INSERT INTO team_stats (team_id, checkin_count, total_weight, first_checkin_at, last_checkin_at, new_members)
+    {EXPECTED_TEAM_STATS_SQL}
+""")
+
+# 比對現有統計值與重新計算結果，列出不一致的隊伍
+TEAM_STATS_DRIFT_SQL = text(f"""
+    WITH expected AS ({EXPECTED_TEAM_STATS_SQL})
+    SELECT
+        COALESCE(e.team_id, s.team_id) AS team_id,
+        s.checkin_count AS stored_checkin_count, e.checkin_count AS expected_checkin_count,
+        s.total_weight AS stored_total_weight, e.total_weight AS expected_total_weight,
+        s.first_checkin_at AS stored_first_checkin_at, e.first_checkin_at AS expected_first_checkin_at,
+        s.last_checkin_at AS stored_last_checkin_at, e.last_checkin_at AS expected_last_checkin_at,
+        s.new_members AS stored_new_members, e.new_members AS expected_new_members
+    FROM expected e
+    FULL OUTER JOIN team_stats s ON s.team_id = e.team_id
+    WHERE COALESCE(s.checkin_count, 0) <> COALESCE(e.checkin_count, 0)
+       OR ABS(COALESCE(s.total_weight, 0) - COALESCE(e.total_weight, 0)) > :tolerance
+       OR s.first_checkin_at IS DISTINCT FROM e.first_checkin_at
+       OR s.last_checkin_at IS DISTINCT FROM e.last_checkin_at
+       OR COALESCE(s.new_members, 0) <> COALESCE(e.new_members, 0)
+    ORDER BY 1
+""")
+
+
+def record_checkins(db: Session, checkin_ids: list):
+    """
+    新打卡紀錄 (可包含多個使用者) 寫入後更新各隊統計值 (不 commit，與打卡在同一個交易)
+    """
+    if checkin_ids:
+        params = {"checkin_ids": list(checkin_ids)}
+        db.execute(LOCK_CHECKIN_USERS_SQL, params)
+        db.execute(RECORD_CHECKINS_SQL, params)
+
+
+def record_joins(db: Session, pairs: list):
+    """
+    新加入的 (user_id, team_id) 寫入 user_teams 後更新統計值 (不 commit，與加入隊伍在同一個交易)
+    """
+    if not pairs:
+        return
+    params = {
+        "user_ids": [user_id for user_id, _ in pairs],
+        "team_ids": [team_id for _, team_id in pairs],
+    }
+    db.execute(LOCK_USERS_SQL, params)
+    db.execute(RECORD_JOINS_WEIGHT_SQL, params)
+    db.execute(RECORD_JOINS_NEW_MEMBERS_SQL, params)
+
+
+def find_drift(db: Session, tolerance: float = 1e-6) -> list:
+    """
+    回傳統計值與原始資料不一致的隊伍 (stored_* / expected_*)
+    """
+    return [dict(row._mapping) for row in db.execute(TEAM_STATS_DRIFT_SQL, {"tolerance": tolerance})]
+
+
+def rebuild(db: Session) -> int:
+    """
+    由原始資料重建 team_stats 並 commit，回傳重建的隊伍數。
+    重建期間鎖住 team_stats，同時進行的打卡 / 加入隊伍會等重建完成後再累加。
+    """
+    db.execute(text("LOCK TABLE team_stats IN EXCLUSIVE MODE"))
+    db.execute(text("DELETE FROM team_stats"))
+    count = db.execute(REBUILD_TEAM_STATS_SQL).rowcount
+    db.commit()
+    return count
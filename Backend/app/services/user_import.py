@@ -0,0 +1,158 @@
+import os
+import re
+import csv
+import json
+from datetime import datetime, timezone
+from sqlalchemy.sql import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import User
+from services import password_hasher
+
+# 單次匯入的最大列數與每個 INSERT statement 的列數
+USER_IMPORT_MAX_ROWS = int(os.getenv("USER_IMPORT_MAX_ROWS", 50000))
+USER_IMPORT_INSERT_BATCH = int(os.getenv("USER_IMPORT_INSERT_BATCH", 1000))
+
+EMAIL_REGEX = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+FIELDS = ("username", "email", "password")
+
+# 單一 anti-join 找出尚未註冊的 email
+UNREGISTERED_EMAILS_SQL = text("""
+    SELECT e.email
+    FROM unnest(CAST(:emails AS VARCHAR[])) AS e(email)
+    LEFT JOIN users u ON u.email = e.email
+    WHERE u.id IS NULL
+""")
+
+
+def detect_format(content_type: str) -> str:
+    """
+    依 Content-Type 判斷格式：NDJSON (application/x-ndjson、application/jsonl) 或 CSV
+    """
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+async def _iter_lines(chunks):
+    """
+    將 bytes 串流切成逐行的字串 (保留換行，供 csv 處理跨行欄位)
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig") + "\n"
+    if buffer:
+        yield buffer.decode("utf-8-sig")
+
+
+async def parse_rows(chunks, fmt: str) -> list:
+    """
+    讀取 CSV (需有 username,email,password 標題列) 或 NDJSON 串流，
+    回傳 (列號, 資料 dict 或 None, 錯誤訊息) 的列表
+    """
+    lines = []
+    async for line in _iter_lines(chunks):
+        if line.strip():
+            lines.append(line)
+        if len(lines) > USER_IMPORT_MAX_ROWS + 1:
+            raise ValueError(f"Import is limited to {USER_IMPORT_MAX_ROWS} rows")
+
+    rows = []
+    if fmt == "ndjson":
+        for number, line in enumerate(lines, start=1):
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                rows.append((number, record, None))
+            except ValueError as e:
+                rows.append((number, None, f"Invalid JSON: {e}"))
+    else:
+        reader = csv.DictReader(lines)
+        missing = [field for field in FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header must include {', '.join(FIELDS)} (missing {', '.join(missing)})")
+        for number, record in enumerate(reader, start=1):
+            rows.append((number, record, None))
+
+    if len(rows) > USER_IMPORT_MAX_ROWS:
+        raise ValueError(f"Import is limited to {USER_IMPORT_MAX_ROWS} rows")
+    return rows
+
+
+def _validate(record: dict):
+    """
+    與註冊 API 相同的欄位規則；回傳錯誤訊息或 None
+    """
+    username = str(record.get("username") or "").strip()
+    email = str(record.get("email") or "").strip()
+    password = str(record.get("password") or "")
+    if not 3 <= len(username) <= 50:
+        return "username must be 3-50 characters"
+    if not EMAIL_REGEX.match(email) or len(email) > 100:
+        return "Invalid email format"
+    if not 6 <= len(password) <= 128:
+        return "password must be 6-128 characters"
+    return None
+
+
+async def import_users(db: AsyncSession, rows: list) -> dict:
+    """
+    匯入使用者：驗證欄位與檔案內重複 → 單一 anti-join 排除已註冊 email (隨即結束交易) → 行程池平行雜湊密碼 →
+    新交易中以多列 INSERT ... ON CONFLICT DO NOTHING RETURNING 分批寫入並 commit。
+    回傳逐列報告 (created / exists / duplicate / invalid) 與統計。
+    """
+    report = {}
+    candidates = {}
+    for number, record, error in rows:
+        error = error or _validate(record)
+        email = str(record.get("email") or "").strip() if record else None
+        if error:
+            report[number] = {"row": number, "email": email, "status": "invalid", "error": error}
+        elif email in candidates:
+            report[number] = {"row": number, "email": email, "status": "duplicate", "error": f"Same email as row {candidates[email][0]}"}
+        else:
+            candidates[email] = (number, str(record["username"]).strip(), str(record["password"]))
+
+    if candidates:
+        unregistered = {
+            row.email for row in await db.execute(UNREGISTERED_EMAILS_SQL, {"emails": list(candidates)})
+        }
+        # 雜湊可能需要數分鐘：先結束查詢的交易並歸還連線，避免連線 idle in transaction
+        await db.rollback()
+        for email, (number, _, _) in candidates.items():
+            if email not in unregistered:
+                report[number] = {"row": number, "email": email, "status": "exists", "error": "Email already registered"}
+
+        new_users = [(email, candidates[email]) for email in candidates if email in unregistered]
+        hashed = await password_hasher.hash_passwords([password for _, (_, _, password) in new_users])
+
+        created = {}
+        current_time = datetime.now(timezone.utc).replace(tzinfo=None)
+        values = [
+            {"username": username, "email": email, "password": password_hash, "created_at": current_time}
+            for (email, (_, username, _)), password_hash in zip(new_users, hashed)
+        ]
+        for start in range(0, len(values), USER_IMPORT_INSERT_BATCH):
+            statement = insert(User).values(values[start:start + USER_IMPORT_INSERT_BATCH])
+            statement = statement.on_conflict_do_nothing().returning(User.id, User.email)
+            created.update({row.email: row.id for row in await db.execute(statement)})
+        await db.commit()
+
+        for email, (number, _, _) in new_users:
+            if email in created:
+                report[number] = {"row": number, "email": email, "status": "created", "user_id": created[email]}
+            else:
+                # 匯入期間被其他請求註冊
+                report[number] = {"row": number, "email": email, "status": "exists", "error": "Email already registered"}
+
+    rows_report = [report[number] for number in sorted(report)]
+    summary = {"total": len(rows_report)}
+    for status in ("created", "exists", "duplicate", "invalid"):
+        summary[status] = sum(1 for row in rows_report if row["status"] == status)
+    return {"summary": summary, "rows": rows_report}
@@ -1,85 +1,30 @@
 import os
 import re
-import uuid
-import base64
-import aiofiles
 from datetime import datetime, timezone, timedelta
 
-from passlib.context import CryptContext
-from google.cloud import storage
+from celery import states
+from celery.signals import task_postrun, worker_shutdown
 
 from models import Event, Checkin, Team, User, Score, Ranking
 from models.association import user_teams
 from database import celery_app, get_postgresql_connection, get_synchronous_session
-from sqlalchemy.exc import SQLAlchemyError
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.create_checkin_records_task")
-def create_checkin_records_task(self, user_id: int, team_ids: list, comment: str, photo_url: str):
+from redis_client import get_redis
+import metrics  # noqa: F401  registers worker task runtime / retry metrics
+from services import leaderboard, read_cache, near_cache, score_singleflight, score_service, score_writer, checkin_stream, team_service, resource_version
+from services.score_updater import rescore_teams
+from services.task_events import publish_task_done
+from services.checkin_service import insert_checkin_batch
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+
+@task_postrun.connect
+def notify_task_done(task_id=None, state=None, **kwargs):
     """
-    Background task to create check-in records for multiple teams.
+    Publish task completion so long-poll and SSE status requests resolve immediately.
     """
     try:
-        # Obtain a new database session
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-
-        current_time = datetime.now(timezone.utc)
-        checkins = []
-
-        # Create Checkin instances for each team
-        for team_id in team_ids:
-            checkin = Checkin(
-                user_id=user_id,
-                team_id=team_id,
-                content=comment,
-                created_at=current_time,
-                photo_url=photo_url
-            )
-            db.add(checkin)
-            checkins.append(checkin)
-
-        # Commit all check-ins at once for efficiency
-        db.commit()
-
-        # Refresh to get updated fields like `id`
-        for checkin in checkins:
-            db.refresh(checkin)
-
-        # Prepare the response data
-        created_checkins = [{
-            "team_id": checkin.team_id,
-            "checkin_id": checkin.id,
-            "photo_url": checkin.photo_url,
-            "created_at": checkin.created_at.astimezone(timezone(timedelta(hours=8))).isoformat(),
-        } for checkin in checkins]
-
-        return created_checkins
-
-    except Exception as exc:
-        # Retry the task in case of failure
-        self.retry(exc=exc)
-    finally:
-        # Ensure the database session is closed
-        db.close()
-
-
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.upload_to_gcp_task")
-def upload_to_gcp_task(bucket_name: str, file_data: bytes, file_name: str) -> str:
-    """
-    Asynchronously upload a file to GCP Cloud Storage and return its URL.
-    """
-    try:
-        storage_client = storage.Client()
-        bucket = storage_client.bucket(bucket_name)
-        blob = bucket.blob(file_name)
-        blob.upload_from_string(file_data, content_type="image/png")
-        return f"https://storage.googleapis.com/{bucket_name}/{file_name}"
+        publish_task_done(get_redis(), task_id, state)
     except Exception as e:
-        # Log the exception or handle accordingly
-        return f"Failed to upload {file_name}: {str(e)}"
+        print(f"Failed to publish completion of task {task_id}: {e}")
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.create_team_task")
@@ -87,9 +32,9 @@ def create_team_task(self, event_id: int, name: str, description: str):
     """
     Background task to create a team for an event.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
 
         current_time = datetime.now(timezone.utc)
         new_team = Team(
@@ -102,6 +47,13 @@ def create_team_task(self, event_id: int, name: str, description: str):
         db.commit()
         db.refresh(new_team)
 
+        redis_conn = get_redis()
+        read_cache.invalidate(redis_conn, read_cache.event_teams_key(event_id))
+        near_cache.publish_invalidation(redis_conn, "event_teams", event_id)
+
+        # 新隊伍以 0 分加入活動排行榜
+        leaderboard.register_team(redis_conn, event_id, new_team.id, new_team.name)
+
         return {"message": "Team created successfully", "team_id": new_team.id}
     except Exception as exc:
         self.retry(exc=exc)
@@ -109,75 +61,89 @@ def create_team_task(self, event_id: int, name: str, description: str):
         db.close()
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.get_teams_task")
-def get_teams_task(self, event_id):
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.join_team_task")
+def join_team_task(self, event_id: int, user_id: int, team_id: int):
     """
-    Background task to get all teams for a specific event.
+    Background task to allow a user to join a team.
+    Event/team ownership and existing membership are checked by the insert statement itself.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-
-        event = db.query(Event).filter(Event.id == event_id).first()
-        if not event:
-            raise ValueError("Event not found")
+        joined = team_service.join_teams(db, event_id, [(user_id, team_id)])
+        if not joined:
+            return {"error": team_service.explain_join_failure(db, event_id, user_id, team_id)}
+        db.commit()
 
-        teams = db.query(Team).filter(Team.event_id == event_id).all()
+        redis_conn = get_redis()
+        read_cache.invalidate(
+            redis_conn,
+            read_cache.event_teams_key(event_id),
+            read_cache.user_teams_key(user_id),
+            read_cache.team_members_key(team_id),
+        )
+        resource_version.bump(redis_conn, [event_id])
 
-        return [{"id": team.id, "name": team.name, "members": team.members} for team in teams]
-    except Exception as exc:
+        return {"message": "User successfully joined the team"}
+    except SQLAlchemyError as exc:
+        db.rollback()
         self.retry(exc=exc)
     finally:
         db.close()
 
 
-
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.join_team_task")
-def join_team_task(self, event_id: int, user_id: int, team_id: int):
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.bulk_join_teams_task")
+def bulk_join_teams_task(self, event_id: int, members: list):
     """
-    Background task to allow a user to join a team.
+    Add many users to teams of an event with one INSERT ... SELECT statement.
+
+    Args:
+        event_id (int): ID of the event.
+        members (list): [user_id, team_id] pairs.
+
+    Returns:
+        dict: Number of joined pairs and the pairs that were skipped
+            (team not in the event, unknown user or already a member).
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-
-        event = db.query(Event).filter(Event.id == event_id).first()
-        if not event:
-            raise ValueError("Event not found")
-        team = db.query(Team).filter(Team.id == team_id,
-                                     Team.event_id == event_id).first()
-        if not team:
-            raise ValueError(
-                "Team not found or not associated with this event")
-        user_team = db.query(user_teams).filter(
-            user_teams.c.user_id == user_id,
-            user_teams.c.team_id == team_id
-        ).first()
-        if user_team:
-            raise ValueError("User already in this team")
-
-        insert_statement = user_teams.insert().values(
-            user_id=user_id,
-            team_id=team_id
-        )
-        db.execute(insert_statement)
+        pairs = [(int(user_id), int(team_id)) for user_id, team_id in members]
+        joined = team_service.join_teams(db, event_id, pairs)
         db.commit()
 
-        return {"message": "User successfully joined the team"}
-    except Exception as exc:
+        if joined:
+            redis_conn = get_redis()
+            read_cache.invalidate(
+                redis_conn,
+                read_cache.event_teams_key(event_id),
+                *{read_cache.user_teams_key(user_id) for user_id, _ in joined},
+                *{read_cache.team_members_key(team_id) for _, team_id in joined},
+            )
+            resource_version.bump(redis_conn, [event_id])
+
+        joined_set = set(joined)
+        return {
+            "message": "Bulk join completed",
+            "joined": len(joined),
+            "skipped": [list(pair) for pair in dict.fromkeys(pairs) if pair not in joined_set],
+        }
+    except SQLAlchemyError as exc:
+        db.rollback()
         self.retry(exc=exc)
     finally:
         db.close()
 
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=10, name="tasks.register_user_task")
-def register_user_task(self, username: str, email: str, password: str):
+def register_user_task(self, username: str, email: str, hashed_password: str):
     """
     Asynchronous task to register a new user.
+    The password is hashed by the API's password hashing pool before dispatch.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-
         # Validate email format
         email_regex = r'^[\w\.-]+@[\w\.-]+\.\w+$'
         if not re.match(email_regex, email):
@@ -188,8 +154,7 @@ def register_user_task(self, username: str, email: str, password: str):
         if existing_user:
             raise ValueError("Email already registered")
 
-        # Hash the password and create a new user
-        hashed_password = pwd_context.hash(password)
+        # Create a new user
         new_user = User(username=username, email=email, password=hashed_password)
         db.add(new_user)
         db.commit()
@@ -207,90 +172,84 @@ def register_user_task(self, username: str, email: str, password: str):
 def calculate_team_score_task(self, team_id: int) -> float:
     """
     Asynchronous task to calculate and cache the team score.
+    Dispatched through services.score_singleflight, which holds one lease per team.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
+    redis_conn = get_redis()
     try:
-        # 計算分數
-        from services.score_service import calculate_team_score
-        score = calculate_team_score(team_id)
-        
-        # 快取到 Redis
-        from database import get_redis_connection
-        redis_conn = get_redis_connection()
-        redis_conn.set(f"team:{team_id}:score", score, ex=3600)  # Cache for 1 hour
+        # 計算分數並快取、更新排行榜，交由 write-behind flusher 寫回 PostgreSQL
+        score = rescore_teams(db, redis_conn, [team_id]).get(team_id)
 
+        score_singleflight.complete(redis_conn, team_id, self.request.id)
         return score
     except Exception as exc:
+        # 最後一次重試失敗時釋放 lease，讓下一個請求可以重新計算
+        if self.request.retries >= self.max_retries:
+            score_singleflight.release(redis_conn, team_id, self.request.id)
         self.retry(exc=exc)
+    finally:
+        db.close()
 
 
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.persist_team_scores_task")
 def persist_team_scores_task(self, scores: list):
     """
-    Batch persist multiple team scores to the database.
+    Set multiple team scores ({"team_id", "value"} dicts); unknown teams are skipped.
+    Each value is stored as an adjustment on top of the score computed from team_stats,
+    so later rescoring keeps the manual change. The teams are then rescored, which caches and ranks
+    the new scores (and replaces any older pending score) in one round trip.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
+    redis_conn = get_redis()
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-        for team_id, score in scores:
-            score_entry = db.query(Score).filter(Score.team_id == team_id).first()
-            if score_entry:
-                score_entry.score = score
-                score_entry.updated_at = datetime.utcnow()
-            else:
-                new_score = Score(team_id=team_id, score=score)
-                db.add(new_score)
+        requested = {int(score["team_id"]): float(score["value"]) for score in scores}
+        team_ids = [team_id for team_id, in db.query(Team.id).filter(Team.id.in_(list(requested))).all()]
+
+        score_service.set_team_scores(db, {team_id: requested[team_id] for team_id in team_ids})
         db.commit()
+        rescore_teams(db, redis_conn, team_ids)
+
+        return {"message": "Scores recorded", "count": len(team_ids)}
     except Exception as exc:
+        db.rollback()
         self.retry(exc=exc)
     finally:
         db.close()
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.get_user_teams_task")
-def get_user_teams_task(self, user_id):
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=10, name="tasks.flush_pending_scores_task")
+def flush_pending_scores_task(self):
     """
-    Background task to get all teams a user has joined.
+    Periodic write-behind flush: persist pending scores with one upsert statement per batch.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-
-        teams = db.query(Team).join(user_teams).filter(
-            user_teams.c.user_id == user_id
-        ).all()
-
-        if not teams:
-            return {"teams": [], "message": "No teams found for this user"}
-
-        return [{"id": team.id, "name": team.name} for team in teams]
-    except Exception as exc:
+        return {"flushed": score_writer.flush_pending_scores(db, get_redis())}
+    except SQLAlchemyError as exc:
+        db.rollback()
         self.retry(exc=exc)
     finally:
         db.close()
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.get_team_members_task")
-def get_team_members_task(self, team_id):
+@worker_shutdown.connect
+def flush_pending_scores_on_shutdown(**kwargs):
     """
-    Background task to retrieve all members of a specific team.
+    Persist whatever is still pending when a worker stops.
     """
+    db_gen = get_synchronous_session()
+    db = next(db_gen)
     try:
-        db_gen = get_postgresql_connection()
-        db = next(db_gen)
-
-        users = db.query(User).join(user_teams, User.id == user_teams.c.user_id).filter(
-            user_teams.c.team_id == team_id
-        ).all()
-
-        if not users:
-            raise ValueError("No members found for this team")
-
-        return [{"id": user.id, "username": user.username} for user in users]
-    except Exception as exc:
-        self.retry(exc=exc)
+        score_writer.flush_pending_scores(db, get_redis())
+    except Exception as e:
+        print(f"Failed to flush pending scores on shutdown: {e}")
     finally:
         db.close()
-        
+
+
 @celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.create_event_task")
 def create_event_task(self, name: str, description: str, start_time: str, end_time: str):
     """
@@ -334,6 +293,10 @@ def create_event_task(self, name: str, description: str, start_time: str, end_ti
         session.add(new_event)
         session.commit()
 
+        redis_conn = get_redis()
+        near_cache.publish_invalidation(redis_conn, "event", new_event.id)
+        resource_version.bump(redis_conn, [new_event.id], events=True)
+
         return {"event_id": new_event.id, "message": "Event created successfully."}
 
     except (SQLAlchemyError, ValueError) as e:
@@ -352,138 +315,69 @@ def create_event_task(self, name: str, description: str, start_time: str, end_ti
         session.close()
 
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.upload_checkin_data_task")
-async def upload_checkin_data_task(event_id: int, user_id: int, comment: str, photo: str):
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=10, name="tasks.create_checkin_batch_task")
+def create_checkin_batch_task(self, submissions: list):
     """
-    Celery task to handle photo upload and initiate check-in record creation.
-    
+    Write a micro-batch of check-in requests collected by the API (services/checkin_batcher.py)
+    in one transaction.
+
     Args:
-        event_id (int): ID of the event.
-        user_id (int): ID of the user uploading the data.
-        comment (str): Comment provided by the user.
-        photo (str): Base64-encoded photo data.
+        submissions (list): Dicts with request_id, event_id, user_id, team_ids, comment and photo_url.
+            Each result is also stored under its request_id, so a request can be polled through
+            /api/event/status/{request_id} like a regular task.
 
     Returns:
-        dict: Dictionary with the result message or error details.
+        dict: request_id -> {"checkins": [...]} or {"error": ...}.
     """
     db_gen = get_synchronous_session()
     db = next(db_gen)
     try:
-        # Verify if the event exists
-        event = db.query(Event).filter(Event.id == event_id).first()
-        if not event:
-            return {"error": "Event not found."}
-
-        # Decode photo if provided
-        photo_url = None
-        if photo:
-            file_data = base64.b64decode(photo)
-            file_name = f"checkin_photos/{uuid.uuid4()}.png"
-
-            # Handle local or cloud upload
-            env = os.getenv("ENV", "dev").lower()
-            if env == "dev":
-                tmp_path = f"/tmp/{file_name}"
+        try:
+            created = insert_checkin_batch(db, submissions)
+            db.commit()
+            results = {
+                submission["request_id"]: {"checkins": checkins}
+                for submission, checkins in zip(submissions, created)
+            }
+        except IntegrityError:
+            # 有請求違反約束 (例如使用者或隊伍不存在)：改為每筆一個 savepoint，只有該筆失敗
+            db.rollback()
+            results = {}
+            for submission in submissions:
                 try:
-                    async with aiofiles.open(tmp_path, "wb") as f:
-                        await f.write(file_data)
-                    photo_url = f"file://{tmp_path}"
-                except Exception as e:
-                    return {"error": f"Failed to save photo locally: {str(e)}"}
-            else:
-                # Dispatch GCP upload task
-                bucket_name = os.getenv("GCP_BUCKET_NAME")
-                if not bucket_name:
-                    return {"error": "GCP_BUCKET_NAME not set."}
-
-                upload_result = upload_to_gcp_task.apply_async(kwargs={
-                    "bucket_name": bucket_name,
-                    "file_data": file_data,
-                    "file_name": file_name
-                })
-                photo_url = upload_result.get(timeout=300)
-
-                if "Failed" in photo_url:
-                    return {"error": f"Photo upload failed: {photo_url}"}
-
-        # Dispatch check-in creation task
-        create_checkin_records_task.delay(
-            user_id=user_id,
-            team_ids=[team.id for team in db.query(Team).filter(Team.event_id == event_id).all()],
-            comment=comment,
-            photo_url=photo_url
-        )
-        return {"message": "Photo upload and check-in initiation completed."}
-    except Exception as e:
-        return {"error": str(e)}
+                    with db.begin_nested():
+                        results[submission["request_id"]] = {"checkins": insert_checkin_batch(db, [submission])[0]}
+                except IntegrityError as e:
+                    results[submission["request_id"]] = {"error": str(e.orig)}
+            db.commit()
+    except SQLAlchemyError as exc:
+        db.rollback()
+        self.retry(exc=exc)
     finally:
         db.close()
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.create_checkin_records_task")
-def create_checkin_records_task(user_id: int, team_ids: list, comment: str, photo_url: str):
-    """
-    Celery task to create check-in records for multiple teams.
-    
-    Args:
-        user_id (int): ID of the user.
-        team_ids (list): List of team IDs.
-        comment (str): Comment provided by the user.
-        photo_url (str): URL of the uploaded photo.
-
-    Returns:
-        dict: Dictionary with success message or error details.
-    """
-    db_gen = get_synchronous_session()
-    db = next(db_gen)
+    redis_conn = get_redis()
+    # 打卡事件寫入事件流，由計分 consumer 批次重算；紀錄已提交，失敗時不重試以免重複打卡
     try:
-        for team_id in team_ids:
-            checkin = Checkin(
-                user_id=user_id,
-                team_id=team_id,
-                content=comment,
-                photo_url=photo_url,
-                created_at=datetime.now(timezone.utc)
-            )
-            db.add(checkin)
-        db.commit()
-        return {"message": "Check-in records created successfully."}
+        checkin_stream.append_checkin_batch(redis_conn, [
+            (submission["event_id"], submission["user_id"], results[submission["request_id"]]["checkins"])
+            for submission in submissions
+            if "checkins" in results[submission["request_id"]]
+        ])
     except Exception as e:
-        db.rollback()
-        return {"error": str(e)}
-    finally:
-        db.close()
+        print(f"Failed to append check-in batch {self.request.id} to the check-in stream: {e}")
+    resource_version.bump(redis_conn, [
+        submission["event_id"] for submission in submissions if "checkins" in results[submission["request_id"]]
+    ])
 
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=60, name="tasks.fetch_event_uploads_task")
-def fetch_event_uploads_task(event_id: int):
-    """
-    Celery task to fetch all uploads for a specific event.
-    
-    Args:
-        event_id (int): ID of the event.
-
-    Returns:
-        list: List of dictionaries containing upload details or error details.
-    """
-    db_gen = get_synchronous_session()
-    db = next(db_gen)
+    # 各請求的結果以 request_id 存入 result backend 並通知等待中的狀態查詢
     try:
-        uploads = (
-            db.query(Checkin)
-            .join(Team, Team.id == Checkin.team_id)
-            .filter(Team.event_id == event_id)
-            .all()
-        )
-        return [
-            {
-                "user_id": upload.user_id,
-                "team_id": upload.team_id,
-                "comment": upload.content,
-                "photo_url": upload.photo_url,
-                "created_at": upload.created_at.isoformat(),
-            }
-            for upload in uploads
-        ]
+        pipe = redis_conn.pipeline(transaction=False)
+        for request_id, result in results.items():
+            self.backend.store_result(request_id, result, states.SUCCESS)
+            publish_task_done(pipe, request_id, states.SUCCESS)
+        pipe.execute()
     except Exception as e:
-        return {"error": str(e)}
-    finally:
-        db.close()
\ No newline at end of file
+        print(f"Failed to store per-request results of check-in batch {self.request.id}: {e}")
+
+    return results
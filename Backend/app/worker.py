@@ -0,0 +1,48 @@
+"""
+Celery worker entry points, one per queue (see CELERY_QUEUES in database.py).
+
+    python worker.py interactive
+    python worker.py media
+    python worker.py scoring
+    python worker.py bulk
+    python worker.py beat
+
+Concurrency and prefetch can be overridden per queue with
+CELERY_<QUEUE>_CONCURRENCY and CELERY_<QUEUE>_PREFETCH, e.g. CELERY_MEDIA_CONCURRENCY=8.
+"""
+import os
+import sys
+
+from database import celery_app, CELERY_QUEUES
+import tasks  # noqa: F401  registers the task definitions
+
+
+def worker_argv(queue: str) -> list:
+    settings = CELERY_QUEUES[queue]
+    prefix = f"CELERY_{queue.upper()}"
+    concurrency = int(os.getenv(f"{prefix}_CONCURRENCY", settings["concurrency"]))
+    prefetch = int(os.getenv(f"{prefix}_PREFETCH", settings["prefetch_multiplier"]))
+    return [
+        "worker",
+        "--queues", queue,
+        "--hostname", f"{queue}@%h",
+        "--concurrency", str(concurrency),
+        "--prefetch-multiplier", str(prefetch),
+        "--loglevel", os.getenv("CELERY_LOG_LEVEL", "INFO"),
+    ]
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in list(CELERY_QUEUES) + ["beat"]:
+        print(__doc__)
+        sys.exit(1)
+
+    target = sys.argv[1]
+    if target == "beat":
+        celery_app.start(["beat", "--loglevel", os.getenv("CELERY_LOG_LEVEL", "INFO")])
+    else:
+        celery_app.worker_main(worker_argv(target))
+
+
+if __name__ == "__main__":
+    main()
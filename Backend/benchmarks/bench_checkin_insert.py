@@ -0,0 +1,95 @@
+"""
+Check-in write benchmark: rows/sec for 1, 10 and 100 teams per user.
+
+Compares the previous per-row ORM path (db.add + db.refresh per checkin) with
+the single INSERT ... RETURNING used by create_checkin_batch_task.
+Runs against the database configured in Backend/app/.env and removes its
+seed data afterwards.
+
+    cd Backend && python benchmarks/bench_checkin_insert.py --iterations 50
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from database import SessionLocalSync  # noqa: E402
+from models import Event, Team, User, Checkin  # noqa: E402
+from services.checkin_service import insert_checkin_batch  # noqa: E402
+
+TEAM_COUNTS = (1, 10, 100)
+
+
+def seed(db, team_count: int):
+    tag = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    event = Event(name=f"bench_{tag}", description="benchmark", start_time=now, end_time=now, created_at=now)
+    user = User(username=f"bench_{tag}", email=f"bench_{tag}@example.com", password="x")
+    db.add_all([event, user])
+    db.flush()
+    teams = [Team(name=f"bench_{tag}_{i}", event_id=event.id, created_at=now) for i in range(team_count)]
+    db.add_all(teams)
+    db.commit()
+    return event, user, [team.id for team in teams]
+
+
+def per_row_orm(db, user_id: int, team_ids: list):
+    event_id = db.get(Team, team_ids[0]).event_id
+    checkins = []
+    for team_id in team_ids:
+        checkin = Checkin(user_id=user_id, team_id=team_id, event_id=event_id, content="bench", photo_url="bench",
+                          created_at=datetime.now(timezone.utc).replace(tzinfo=None))
+        db.add(checkin)
+        checkins.append(checkin)
+    db.commit()
+    for checkin in checkins:
+        db.refresh(checkin)
+
+
+def bulk_returning(db, user_id: int, team_ids: list):
+    insert_checkin_batch(db, [{"user_id": user_id, "team_ids": team_ids, "comment": "bench", "photo_url": "bench"}])
+    db.commit()
+
+
+def measure(fn, db, user_id: int, team_ids: list, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(db, user_id, team_ids)
+    elapsed = time.perf_counter() - start
+    return len(team_ids) * iterations / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50, help="check-in requests per measurement")
+    args = parser.parse_args()
+
+    db = SessionLocalSync()
+    report = {}
+    try:
+        for team_count in TEAM_COUNTS:
+            event, user, team_ids = seed(db, team_count)
+            try:
+                report[team_count] = {
+                    "per_row_orm_rows_per_sec": round(measure(per_row_orm, db, user.id, team_ids, args.iterations), 1),
+                    "bulk_returning_rows_per_sec": round(measure(bulk_returning, db, user.id, team_ids, args.iterations), 1),
+                }
+            finally:
+                db.query(Checkin).filter(Checkin.user_id == user.id).delete(synchronize_session=False)
+                db.query(Team).filter(Team.event_id == event.id).delete(synchronize_session=False)
+                db.delete(event)
+                db.delete(user)
+                db.commit()
+    finally:
+        db.close()
+
+    print(json.dumps({"teams_per_user": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Endpoint benchmark: drives the real FastAPI routes at a fixed concurrency and
+reports p50/p95/p99 latency and throughput per route as JSON.
+
+By default main.app is booted in-process (httpx ASGI transport) against the
+Postgres/Redis configured in Backend/app/.env. --eager runs Celery tasks inline
+so no worker is needed; --base-url targets an already running deployment instead.
+A synthetic event (users, teams, memberships) is seeded first and removed at the end.
+
+    cd Backend && pip install -r benchmarks/requirements.txt
+    python benchmarks/bench_endpoints.py --eager --concurrency 20 --requests 200 --output before.json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from datetime import datetime, timezone, timedelta
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from database import SessionLocalSync, celery_app  # noqa: E402
+from models import Event, Team, User, Checkin, Score, user_teams  # noqa: E402
+from services.password_hasher import pwd_context  # noqa: E402
+from services import team_stats  # noqa: E402
+
+PASSWORD = "benchmark-password"
+
+
+# ------------------ Seed Data ------------------
+
+def seed(users: int, teams: int):
+    """
+    Create an active event with users, teams and random memberships.
+    """
+    tag = uuid.uuid4().hex[:8]
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    hashed = pwd_context.hash(PASSWORD)
+
+    db = SessionLocalSync()
+    try:
+        event = Event(name=f"bench_{tag}", description="benchmark", start_time=now - timedelta(hours=1),
+                      end_time=now + timedelta(hours=6), created_at=now)
+        db.add(event)
+        db.flush()
+        user_rows = [User(username=f"bench_{tag}_{i}", email=f"bench_{tag}_{i}@example.com", password=hashed)
+                     for i in range(users)]
+        team_rows = [Team(name=f"bench_{tag}_{i}", description="benchmark", event_id=event.id, created_at=now)
+                     for i in range(teams)]
+        db.add_all(user_rows + team_rows)
+        db.flush()
+        memberships = [(user.id, team_rows[i % teams].id) for i, user in enumerate(user_rows)]
+        db.execute(user_teams.insert(), [{"user_id": user_id, "team_id": team_id} for user_id, team_id in memberships])
+        # Update team_stats in the same transaction, as join_team_task does
+        team_stats.record_joins(db, memberships)
+        db.commit()
+        return {
+            "tag": tag,
+            "event_id": event.id,
+            "user_ids": [user.id for user in user_rows],
+            "emails": [user.email for user in user_rows],
+            "team_ids": [team.id for team in team_rows],
+        }
+    finally:
+        db.close()
+
+
+def cleanup(data: dict):
+    db = SessionLocalSync()
+    try:
+        team_ids = db.query(Team.id).filter(Team.event_id == data["event_id"]).subquery()
+        db.query(Checkin).filter(Checkin.team_id.in_(team_ids)).delete(synchronize_session=False)
+        db.query(Score).filter(Score.team_id.in_(team_ids)).delete(synchronize_session=False)
+        db.execute(user_teams.delete().where(user_teams.c.team_id.in_(team_ids)))
+        db.query(Team).filter(Team.event_id == data["event_id"]).delete(synchronize_session=False)
+        db.query(Event).filter(Event.id == data["event_id"]).delete(synchronize_session=False)
+        db.query(User).filter(User.username.like(f"bench_{data['tag']}_%")).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+# ------------------ Scenarios ------------------
+
+def build_scenarios(data: dict) -> dict:
+    """
+    Map route name to a function (i) -> request kwargs for httpx.
+    """
+    event_id = data["event_id"]
+    user_ids, team_ids, emails = data["user_ids"], data["team_ids"], data["emails"]
+    tag = data["tag"]
+    photo = b"\x89PNG\r\n\x1a\n" + os.urandom(16 * 1024)
+
+    return {
+        "register": lambda i: dict(method="POST", url="/api/user/register", json={
+            "username": f"bench_{tag}_r{i}", "email": f"bench_{tag}_r{i}@example.com", "password": PASSWORD}),
+        "login": lambda i: dict(method="POST", url="/api/user/login", json={
+            "email": emails[i % len(emails)], "password": PASSWORD}),
+        "create_team": lambda i: dict(method="POST", url=f"/api/event/{event_id}/team/create", json={
+            "name": f"bench_{tag}_t{i}", "description": "benchmark"}),
+        "join_team": lambda i: dict(method="POST", url=f"/api/event/{event_id}/teams/join", json={
+            "user_id": user_ids[i % len(user_ids)], "team_id": team_ids[(i * 7 + 1) % len(team_ids)]}),
+        "upload": lambda i: dict(method="POST", url=f"/api/event/{event_id}/upload",
+                                 data={"user_id": str(user_ids[i % len(user_ids)]), "comment": "benchmark"},
+                                 files={"photo": ("bench.png", photo, "image/png")}),
+        "ranking": lambda i: dict(method="GET", url=f"/api/event/{event_id}/ranking",
+                                  params={"limit": 10, "team_id": team_ids[i % len(team_ids)]}),
+        "score": lambda i: dict(method="GET", url=f"/api/team/{team_ids[i % len(team_ids)]}/score"),
+    }
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def run_route(client: httpx.AsyncClient, build_request, requests: int, concurrency: int, task_ids: list):
+    latencies, errors = [], 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                response = await client.request(**build_request(i))
+                ok = response.status_code < 400
+                if ok and response.headers.get("content-type", "").startswith("application/json"):
+                    body = response.json()
+                    if isinstance(body, dict) and body.get("task_id"):
+                        task_ids.append(body["task_id"])
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            if not ok:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+async def run(args, data: dict) -> dict:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        lifespan = None
+    else:
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=args.timeout)
+        lifespan = app.router.lifespan_context(app)
+
+    scenarios = build_scenarios(data)
+    routes = args.routes or list(scenarios) + ["status"]
+    task_ids = []
+    report = {}
+
+    if lifespan is not None:
+        await lifespan.__aenter__()
+    try:
+        async with client:
+            for route in routes:
+                if route == "status":
+                    ids = task_ids or ["missing"]
+                    build = lambda i: dict(method="GET", url=f"/api/event/status/{ids[i % len(ids)]}")
+                else:
+                    build = scenarios[route]
+                report[route] = await run_route(client, build, args.requests, args.concurrency, task_ids)
+    finally:
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="benchmark a running server instead of booting main.app in-process")
+    parser.add_argument("--eager", action="store_true", help="run Celery tasks inline (no worker needed)")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--teams", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--routes", nargs="*", help="subset of: register login create_team join_team upload ranking score status")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the seeded data")
+    args = parser.parse_args()
+
+    if args.eager:
+        celery_app.conf.update(task_always_eager=True, task_store_eager_result=True)
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    data = seed(args.users, args.teams)
+    try:
+        routes = asyncio.run(run(args, data))
+    finally:
+        if not args.keep:
+            cleanup(data)
+
+    report = {
+        "started_at": started_at,
+        "concurrency": args.concurrency,
+        "requests_per_route": args.requests,
+        "eager": args.eager,
+        "target": args.base_url or "in-process",
+        "routes": routes,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Queue isolation load test (stand-in tasks): saturates the media queue with slow
+tasks and measures the latency of interactive tasks, once with the per-queue
+workers from worker.py and once with a single worker consuming both queues.
+
+Uses the Redis broker / result backend configured in Backend/app/.env; the probe
+and load tasks are registered by this script, so no database is touched.
+
+    cd Backend && python benchmarks/bench_queue_isolation.py --load 400 --probes 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from database import celery_app, CELERY_QUEUES  # noqa: E402
+from worker import worker_argv  # noqa: E402
+
+
+@celery_app.task(name="bench.interactive_probe")
+def interactive_probe():
+    return time.time()
+
+
+@celery_app.task(name="bench.media_load")
+def media_load(seconds: float):
+    time.sleep(seconds)
+
+
+def start_workers(mode: str) -> list:
+    script = os.path.abspath(__file__)
+    if mode == "isolated":
+        targets = ["interactive", "media"]
+    else:
+        targets = ["shared"]
+    return [subprocess.Popen([sys.executable, script, "--worker", target]) for target in targets]
+
+
+def run_worker(target: str):
+    if target == "shared":
+        media = CELERY_QUEUES["media"]
+        argv = [
+            "worker", "--queues", "interactive,media", "--hostname", "shared@%h",
+            "--concurrency", str(media["concurrency"]),
+            "--prefetch-multiplier", str(media["prefetch_multiplier"]),
+            "--loglevel", "WARNING",
+        ]
+    else:
+        argv = worker_argv(target)
+    celery_app.worker_main(argv)
+
+
+def wait_for_workers(expected: int, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        replies = celery_app.control.ping(timeout=1.0) or []
+        if len(replies) >= expected:
+            return
+    raise RuntimeError("Workers did not start in time")
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def measure(mode: str, load: int, load_seconds: float, probes: int, interval: float) -> dict:
+    workers = start_workers(mode)
+    try:
+        wait_for_workers(len(workers))
+        celery_app.control.purge()
+
+        for _ in range(load):
+            media_load.apply_async(args=[load_seconds], queue="media")
+
+        latencies = []
+        for _ in range(probes):
+            start = time.perf_counter()
+            interactive_probe.apply_async(queue="interactive").get(timeout=600)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(interval)
+
+        latencies.sort()
+        return {
+            "probes": probes,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    finally:
+        celery_app.control.purge()
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--load", type=int, default=400, help="slow tasks queued on the media queue")
+    parser.add_argument("--load-seconds", type=float, default=0.5, help="duration of each media task")
+    parser.add_argument("--probes", type=int, default=50, help="interactive tasks to time")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between probes")
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker)
+        return
+
+    report = {
+        "media_load_tasks": args.load,
+        "media_task_seconds": args.load_seconds,
+        "interactive_latency": {
+            mode: measure(mode, args.load, args.load_seconds, args.probes, args.interval)
+            for mode in ("isolated", "shared")
+        },
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Response serialization benchmark: milliseconds to encode 10k upload rows.
+
+Compares the previous path (rows copied into dicts, then FastAPI's
+jsonable_encoder + stdlib json via JSONResponse), the ORJSONResponse app
+default (jsonable_encoder + orjson) and RowJSONResponse, which encodes the
+SQLAlchemy rows straight to bytes. Uses synthetic rows, no database needed.
+
+    cd Backend && python benchmarks/bench_serialization.py --rows 10000 --repeat 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from sqlalchemy.engine.result import result_tuple  # noqa: E402
+from services.serialization import RowJSONResponse  # noqa: E402
+
+UPLOAD_FIELDS = ["id", "user_id", "team_id", "comment", "photo_url", "created_at"]
+
+
+def make_rows(count: int) -> list:
+    make_row = result_tuple(UPLOAD_FIELDS)
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        make_row((i, i % 5000, i % 300, f"comment {i}", f"https://storage.example.com/photos/{i}.jpg",
+                  start + timedelta(seconds=i, microseconds=i % 1000)))
+        for i in range(count)
+    ]
+
+
+def as_dicts(rows: list) -> list:
+    return [
+        {
+            "id": row.id,
+            "user_id": row.user_id,
+            "team_id": row.team_id,
+            "comment": row.comment,
+            "photo_url": row.photo_url,
+            "created_at": row.created_at.isoformat(),
+        }
+        for row in rows
+    ]
+
+
+def stdlib_json(rows: list) -> bytes:
+    return JSONResponse(jsonable_encoder({"uploads": as_dicts(rows), "next_cursor": None})).body
+
+
+def orjson_default(rows: list) -> bytes:
+    return ORJSONResponse(jsonable_encoder({"uploads": as_dicts(rows), "next_cursor": None})).body
+
+
+def orjson_rows(rows: list) -> bytes:
+    return RowJSONResponse({"uploads": rows, "next_cursor": None}).body
+
+
+def measure(fn, rows: list, repeat: int) -> float:
+    fn(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per response")
+    parser.add_argument("--repeat", type=int, default=20, help="encodings per measurement")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # All three paths must produce the same document
+    expected = json.loads(stdlib_json(rows))
+    for fn in (orjson_default, orjson_rows):
+        assert json.loads(fn(rows)) == expected, fn.__name__
+
+    scale = 10000 / args.rows
+    report = {
+        fn.__name__: {"ms_per_10k_rows": round(measure(fn, rows, args.repeat) * scale, 2)}
+        for fn in (stdlib_json, orjson_default, orjson_rows)
+    }
+    report["bytes"] = len(orjson_rows(rows))
+    print(json.dumps({"rows": args.rows, "serialization": report}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Shared fixtures. Tests run against the PostgreSQL (and Redis) configured in Backend/app/.env
+inside a transaction that is rolled back, and are skipped when it is unreachable.
+
+    cd Backend && python -m pytest -q tests
+"""
+import os
+import sys
+import uuid
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from redis.exceptions import RedisError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from database import SessionLocalSync, engine_sync  # noqa: E402
+from redis_client import get_redis  # noqa: E402
+from models import Event, Team, User  # noqa: E402
+from models.association import user_teams  # noqa: E402
+from services import team_service  # noqa: E402
+from services.checkin_service import insert_checkin_batch  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    session = SessionLocalSync()
+    try:
+        session.connection()
+    except OperationalError as e:
+        session.close()
+        pytest.skip(f"PostgreSQL unavailable: {e}")
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def redis_conn():
+    conn = get_redis()
+    try:
+        conn.ping()
+    except RedisError as e:
+        pytest.skip(f"Redis unavailable: {e}")
+    return conn
+
+
+@pytest.fixture
+def statements():
+    """
+    SQL statements sent by engine_sync while the test runs.
+    """
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine_sync, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine_sync, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def seed_team(db):
+    """
+    Builds one event and team whose members check in once each (not committed); returns the team id.
+    shared_members of them then also join a second team of the event, and late_members users registered
+    after the first check-in join and check in, so team_stats goes through its incremental join paths.
+    """
+    def seed(checkins: int, shared_members: int = 0, late_members: int = 0) -> int:
+        tag = uuid.uuid4().hex[:8]
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        event_row = Event(name=f"test_{tag}", description="test", start_time=now, end_time=now, created_at=now)
+        db.add(event_row)
+        db.flush()
+        team = Team(name=f"test_{tag}", event_id=event_row.id, created_at=now)
+        other_team = Team(name=f"test_{tag}_other", event_id=event_row.id, created_at=now)
+        users = [
+            User(username=f"test_{tag}_{i}", email=f"test_{tag}_{i}@example.com", password="x",
+                 created_at=now - timedelta(days=1))
+            for i in range(checkins)
+        ]
+        db.add_all([team, other_team] + users)
+        db.flush()
+        db.execute(user_teams.insert(), [{"user_id": user.id, "team_id": team.id} for user in users])
+        insert_checkin_batch(db, [
+            {"user_id": user.id, "team_ids": [team.id], "comment": "test", "photo_url": "test"}
+            for user in users
+        ])
+
+        if shared_members:
+            team_service.join_teams(db, event_row.id, [(user.id, other_team.id) for user in users[:shared_members]])
+        if late_members:
+            late = [
+                User(username=f"test_{tag}_late_{i}", email=f"test_{tag}_late_{i}@example.com", password="x",
+                     created_at=now + timedelta(hours=1))
+                for i in range(late_members)
+            ]
+            db.add_all(late)
+            db.flush()
+            team_service.join_teams(db, event_row.id, [(user.id, team.id) for user in late])
+            insert_checkin_batch(db, [
+                {"user_id": user.id, "team_ids": [team.id], "comment": "test", "photo_url": "test"}
+                for user in late
+            ])
+        return team.id
+
+    return seed
@@ -0,0 +1,89 @@
+import pytest
+from sqlalchemy import func
+
+from models import Checkin, Team, User, user_teams
+from services import leaderboard, score_service, score_writer
+from services.checkin_service import insert_checkin_batch
+from services.score_service import calculate_team_score, ALPHA, BETA
+from services.score_updater import rescore_teams, SCORE_CACHE_KEY, SCORE_VERSIONS_KEY
+
+CHECKINS = 20
+
+
+def reference_team_score(db, team_id: int) -> float:
+    """
+    The original per-user formula, straight from checkins / user_teams:
+    one team-count query per check-in, no team_stats.
+    """
+    user_ids = [user_id for user_id, in db.query(Checkin.user_id).filter(Checkin.team_id == team_id)]
+    total_weight = 0.0
+    for user_id in user_ids:
+        team_count = db.query(func.count(user_teams.c.team_id)).filter(user_teams.c.user_id == user_id).scalar()
+        total_weight += 1 / team_count
+
+    times = [created_at for created_at, in db.query(Checkin.created_at).filter(Checkin.team_id == team_id)]
+    time_difference = (max(times) - min(times)).total_seconds() / 60 if len(times) >= 2 else 0
+
+    new_members = 0
+    if times:
+        new_members = db.query(User.id).join(user_teams, User.id == user_teams.c.user_id).filter(
+            user_teams.c.team_id == team_id,
+            User.created_at > min(times),
+        ).count()
+
+    return round(total_weight / (ALPHA * (time_difference + 1)) + BETA * new_members, 0)
+
+
+@pytest.mark.parametrize("shared_members, late_members", [(0, 0), (CHECKINS // 2, 0), (CHECKINS // 2, 3)])
+def test_score_matches_per_user_formula(db, seed_team, shared_members, late_members):
+    team_id = seed_team(CHECKINS, shared_members=shared_members, late_members=late_members)
+
+    assert calculate_team_score(team_id, db) == reference_team_score(db, team_id)
+
+
+def test_score_query_count_does_not_grow_with_checkins(db, statements, seed_team):
+    counts = {}
+    for checkins in (CHECKINS, CHECKINS * 10):
+        team_id = seed_team(checkins)
+        statements.clear()
+        assert calculate_team_score(team_id, db) > 0
+        counts[checkins] = len(statements)
+
+    assert counts[CHECKINS] == counts[CHECKINS * 10] == 1
+
+
+def test_rescoring_same_data_is_stable(db, redis_conn, seed_team):
+    team_id = seed_team(CHECKINS)
+    event_id = db.query(Team.event_id).filter(Team.id == team_id).scalar()
+    try:
+        first = rescore_teams(db, redis_conn, [team_id])[team_id]
+        second = rescore_teams(db, redis_conn, [team_id])[team_id]
+
+        assert first == second == calculate_team_score(team_id, db)
+        # 待寫回的分數 (flush 後即為 scores 表中的值) 也不會隨重算累加
+        assert float(redis_conn.hget(score_writer.PENDING_SCORES_KEY, team_id)) == first
+    finally:
+        redis_conn.hdel(score_writer.PENDING_SCORES_KEY, team_id)
+        redis_conn.hdel(SCORE_VERSIONS_KEY, team_id)
+        redis_conn.delete(
+            SCORE_CACHE_KEY.format(team_id=team_id),
+            leaderboard.LEADERBOARD_KEY.format(event_id=event_id),
+            leaderboard.TEAM_NAMES_KEY.format(event_id=event_id),
+        )
+
+
+def test_manual_score_update_survives_rescoring(db, seed_team):
+    # /api/score/update -> persist_team_scores_task -> score_service.set_team_scores
+    team_id = seed_team(CHECKINS)
+    computed_before = score_service._stats_score(score_service.fetch_team_score_stats(team_id, db))
+
+    score_service.set_team_scores(db, {team_id: 1000.0})
+    assert calculate_team_score(team_id, db) == 1000
+
+    # 新的打卡改變統計值後，重算結果為手動設定的分數加上統計分數的變化量
+    user_id = db.query(user_teams.c.user_id).filter(user_teams.c.team_id == team_id).limit(1).scalar()
+    insert_checkin_batch(db, [{"user_id": user_id, "team_ids": [team_id], "comment": "test", "photo_url": "test"}])
+    computed_after = score_service._stats_score(score_service.fetch_team_score_stats(team_id, db))
+
+    assert computed_after != computed_before
+    assert calculate_team_score(team_id, db) == round(1000 + computed_after - computed_before, 0)
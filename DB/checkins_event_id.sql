@@ -0,0 +1,16 @@
+-- Adds checkins.event_id for databases created before it was part of init_data.sql,
+-- and replaces the global (created_at, id) index with an event-scoped one for the uploads list.
+-- Run outside a transaction (CREATE INDEX CONCURRENTLY):  psql -U $POSTGRES_USER -d $POSTGRES_DB -f DB/checkins_event_id.sql
+ALTER TABLE checkins ADD COLUMN IF NOT EXISTS event_id INT;
+
+UPDATE checkins c
+SET event_id = t.event_id
+FROM teams t
+WHERE t.id = c.team_id AND c.event_id IS NULL;
+
+ALTER TABLE checkins ALTER COLUMN event_id SET NOT NULL;
+ALTER TABLE checkins ADD CONSTRAINT checkins_event_id_fkey
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_checkins_event_id_created_at_id ON checkins (event_id, created_at DESC, id DESC);
+DROP INDEX CONCURRENTLY IF EXISTS ix_checkins_created_at_id;
@@ -1,4 +1,5 @@
 -- Drop tables if they already exist (in correct dependency order)
+DROP TABLE IF EXISTS team_stats CASCADE;
 DROP TABLE IF EXISTS checkins CASCADE;
 DROP TABLE IF EXISTS scores CASCADE;
 DROP TABLE IF EXISTS user_teams CASCADE;
@@ -41,6 +42,7 @@ CREATE TABLE user_teams (
     id SERIAL PRIMARY KEY,
     user_id INT NOT NULL,
     team_id INT NOT NULL,
+    UNIQUE (user_id, team_id),  -- join-team inserts rely on ON CONFLICT (user_id, team_id) DO NOTHING
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
     FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE
 );
@@ -49,11 +51,13 @@ CREATE TABLE user_teams (
 CREATE TABLE checkins (
     id SERIAL PRIMARY KEY,
     team_id INT NOT NULL,
+    event_id INT NOT NULL,           -- copied from teams.event_id, so uploads can be listed per event
     user_id INT NOT NULL,
     content TEXT NOT NULL,
     photo_url VARCHAR(255) NOT NULL, -- New photo URL column
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE,
+    FOREIGN KEY (event_id) REFERENCES events (id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
 );
 
@@ -62,6 +66,26 @@ CREATE TABLE scores (
     id SERIAL PRIMARY KEY,              -- 新增自增主鍵
     team_id INT UNIQUE NOT NULL,        -- 保證每個隊伍僅有一條記錄
     score FLOAT DEFAULT 0.0,            -- 分數
+    adjustment FLOAT NOT NULL DEFAULT 0.0, -- 手動設定分數時與計算分數的差值，重算時加回
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- 更新時間
     FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE -- 設置外鍵約束
 );
+
+-- 7. Indexes for keyset pagination on (created_at, id) and per-event team lookups
+CREATE INDEX ix_events_created_at_id ON events (created_at DESC, id DESC);
+CREATE INDEX ix_checkins_event_id_created_at_id ON checkins (event_id, created_at DESC, id DESC);
+CREATE INDEX ix_teams_event_id ON teams (event_id);
+CREATE INDEX ix_checkins_user_id_team_id ON checkins (user_id, team_id);
+
+-- 8. Create 'team_stats' table: per-team scoring aggregates, updated in the same
+--    transaction as every check-in and team join (rebuild: python rebuild_team_stats.py)
+CREATE TABLE team_stats (
+    team_id INT PRIMARY KEY,
+    checkin_count INT NOT NULL DEFAULT 0,
+    total_weight FLOAT NOT NULL DEFAULT 0.0,  -- sum of 1 / (teams the check-in's user belongs to)
+    first_checkin_at TIMESTAMP,
+    last_checkin_at TIMESTAMP,
+    new_members INT NOT NULL DEFAULT 0,       -- members created after the first check-in
+    version BIGSERIAL,                        -- new value from team_stats_version_seq on every update
+    FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE
+);
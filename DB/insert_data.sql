@@ -46,18 +46,21 @@ VALUES
 (10, 5);
 
 -- Insert fake check-ins with photo URLs
-INSERT INTO checkins (team_id, user_id, content, photo_url)
-VALUES
-(1, 1, 'Check-in 1 by user1 in team1', 'https://example.com/photos/checkin1.jpg'),
-(1, 2, 'Check-in 2 by user2 in team1', 'https://example.com/photos/checkin2.jpg'),
-(2, 1, 'Check-in 3 by user1 in team2', 'https://example.com/photos/checkin3.jpg'),
-(2, 3, 'Check-in 4 by user3 in team2', 'https://example.com/photos/checkin4.jpg'),
-(3, 4, 'Check-in 5 by user4 in team3', 'https://example.com/photos/checkin5.jpg'),
-(4, 5, 'Check-in 6 by user5 in team4', 'https://example.com/photos/checkin6.jpg'),
-(5, 6, 'Check-in 7 by user6 in team5', 'https://example.com/photos/checkin7.jpg'),
-(5, 7, 'Check-in 8 by user7 in team5', 'https://example.com/photos/checkin8.jpg'),
-(4, 8, 'Check-in 9 by user8 in team4', 'https://example.com/photos/checkin9.jpg'),
-(3, 9, 'Check-in 10 by user9 in team3', 'https://example.com/photos/checkin10.jpg');
+INSERT INTO checkins (team_id, event_id, user_id, content, photo_url)
+SELECT v.team_id, t.event_id, v.user_id, v.content, v.photo_url
+FROM (VALUES
+    (1, 1, 'Check-in 1 by user1 in team1', 'https://example.com/photos/checkin1.jpg'),
+    (1, 2, 'Check-in 2 by user2 in team1', 'https://example.com/photos/checkin2.jpg'),
+    (2, 1, 'Check-in 3 by user1 in team2', 'https://example.com/photos/checkin3.jpg'),
+    (2, 3, 'Check-in 4 by user3 in team2', 'https://example.com/photos/checkin4.jpg'),
+    (3, 4, 'Check-in 5 by user4 in team3', 'https://example.com/photos/checkin5.jpg'),
+    (4, 5, 'Check-in 6 by user5 in team4', 'https://example.com/photos/checkin6.jpg'),
+    (5, 6, 'Check-in 7 by user6 in team5', 'https://example.com/photos/checkin7.jpg'),
+    (5, 7, 'Check-in 8 by user7 in team5', 'https://example.com/photos/checkin8.jpg'),
+    (4, 8, 'Check-in 9 by user8 in team4', 'https://example.com/photos/checkin9.jpg'),
+    (3, 9, 'Check-in 10 by user9 in team3', 'https://example.com/photos/checkin10.jpg')
+) AS v (team_id, user_id, content, photo_url)
+JOIN teams t ON t.id = v.team_id;
 
 -- Insert fake scores
 INSERT INTO scores (team_id, score)
@@ -66,4 +69,36 @@ VALUES
 (2, 40.5),
 (3, 70.3),
 (4, 60.2),
-(5, 45.8);
\ No newline at end of file
+(5, 45.8);
+-- Fill team_stats from the seeded check-ins and memberships (same query as DB/team_stats.sql)
+INSERT INTO team_stats (team_id, checkin_count, total_weight, first_checkin_at, last_checkin_at, new_members)
+WITH membership AS (
+    SELECT user_id, COUNT(*) AS team_count
+    FROM user_teams
+    GROUP BY user_id
+),
+checkin_stats AS (
+    SELECT
+        c.team_id,
+        COUNT(*) AS checkin_count,
+        COALESCE(SUM(1.0 / m.team_count), 0) AS total_weight,
+        MIN(c.created_at) AS first_checkin_at,
+        MAX(c.created_at) AS last_checkin_at
+    FROM checkins c
+    LEFT JOIN membership m ON m.user_id = c.user_id
+    GROUP BY c.team_id
+)
+SELECT
+    cs.team_id,
+    cs.checkin_count,
+    cs.total_weight,
+    cs.first_checkin_at,
+    cs.last_checkin_at,
+    (
+        SELECT COUNT(*)
+        FROM user_teams ut
+        JOIN users u ON u.id = ut.user_id
+        WHERE ut.team_id = cs.team_id
+          AND u.created_at > cs.first_checkin_at
+    ) AS new_members
+FROM checkin_stats cs;
@@ -0,0 +1,17 @@
+-- Read-only role for the read engine (POSTGRES_READ_USER / POSTGRES_READ_PASSWORD).
+-- Pointing the read engine at the same instance with this role exercises replica routing locally:
+-- any write that is routed to the read engine fails with "permission denied".
+-- Run after init_data.sql:  psql -U $POSTGRES_USER -d $POSTGRES_DB -v reader_password="'secret'" -f DB/read_role.sql
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_roles WHERE rolname = 'app_reader') THEN
+        CREATE ROLE app_reader LOGIN;
+    END IF;
+END
+$$;
+ALTER ROLE app_reader PASSWORD :reader_password;
+
+GRANT USAGE ON SCHEMA public TO app_reader;
+GRANT SELECT ON ALL TABLES IN SCHEMA public TO app_reader;
+ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT SELECT ON TABLES TO app_reader;
+ALTER ROLE app_reader SET default_transaction_read_only = on;
@@ -0,0 +1,5 @@
+-- Adds scores.adjustment for databases created before it was part of init_data.sql.
+-- /api/score/update stores the difference between the requested and the computed score here,
+-- and rescoring adds it back, so manual score changes survive later check-ins.
+-- Run after init_data.sql:  psql -U $POSTGRES_USER -d $POSTGRES_DB -f DB/scores_adjustment.sql
+ALTER TABLE scores ADD COLUMN IF NOT EXISTS adjustment FLOAT NOT NULL DEFAULT 0.0;
@@ -0,0 +1,52 @@
+-- Creates team_stats for databases created before it was part of init_data.sql and fills it from
+-- the existing checkins / user_teams rows (same query as services/team_stats.EXPECTED_TEAM_STATS_SQL).
+-- Safe to re-run: the table is rebuilt under an exclusive lock, so concurrent check-ins wait for it.
+-- Run after init_data.sql:  psql -U $POSTGRES_USER -d $POSTGRES_DB -f DB/team_stats.sql
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS team_stats (
+    team_id INT PRIMARY KEY,
+    checkin_count INT NOT NULL DEFAULT 0,
+    total_weight FLOAT NOT NULL DEFAULT 0.0,  -- sum of 1 / (teams the check-in's user belongs to)
+    first_checkin_at TIMESTAMP,
+    last_checkin_at TIMESTAMP,
+    new_members INT NOT NULL DEFAULT 0,       -- members created after the first check-in
+    FOREIGN KEY (team_id) REFERENCES teams (id) ON DELETE CASCADE
+);
+
+LOCK TABLE team_stats IN EXCLUSIVE MODE;
+DELETE FROM team_stats;
+
+INSERT INTO team_stats (team_id, checkin_count, total_weight, first_checkin_at, last_checkin_at, new_members)
+WITH membership AS (
+    SELECT user_id, COUNT(*) AS team_count
+    FROM user_teams
+    GROUP BY user_id
+),
+checkin_stats AS (
+    SELECT
+        c.team_id,
+        COUNT(*) AS checkin_count,
+        COALESCE(SUM(1.0 / m.team_count), 0) AS total_weight,
+        MIN(c.created_at) AS first_checkin_at,
+        MAX(c.created_at) AS last_checkin_at
+    FROM checkins c
+    LEFT JOIN membership m ON m.user_id = c.user_id
+    GROUP BY c.team_id
+)
+SELECT
+    cs.team_id,
+    cs.checkin_count,
+    cs.total_weight,
+    cs.first_checkin_at,
+    cs.last_checkin_at,
+    (
+        SELECT COUNT(*)
+        FROM user_teams ut
+        JOIN users u ON u.id = ut.user_id
+        WHERE ut.team_id = cs.team_id
+          AND u.created_at > cs.first_checkin_at
+    ) AS new_members
+FROM checkin_stats cs;
+
+COMMIT;
@@ -0,0 +1,5 @@
+-- Adds team_stats.version for databases whose team_stats table predates it (run after DB/team_stats.sql).
+-- Every team_stats update takes a new value from team_stats_version_seq; the scorer uses it to drop
+-- a rescore result that is older than the score already written.
+-- Run after init_data.sql:  psql -U $POSTGRES_USER -d $POSTGRES_DB -f DB/team_stats_version.sql
+ALTER TABLE team_stats ADD COLUMN IF NOT EXISTS version BIGSERIAL;
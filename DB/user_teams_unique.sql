@@ -0,0 +1,13 @@
+-- Adds the UNIQUE (user_id, team_id) constraint to user_teams for databases created before it was part of init_data.sql.
+-- Join-team inserts use ON CONFLICT (user_id, team_id) DO NOTHING and fail without it.
+-- Duplicate memberships are removed first, keeping the oldest row of each pair.
+-- Run after init_data.sql:  psql -U $POSTGRES_USER -d $POSTGRES_DB -f DB/user_teams_unique.sql
+BEGIN;
+
+DELETE FROM user_teams a
+USING user_teams b
+WHERE a.user_id = b.user_id AND a.team_id = b.team_id AND a.id > b.id;
+
+ALTER TABLE user_teams ADD CONSTRAINT user_teams_user_id_team_id_key UNIQUE (user_id, team_id);
+
+COMMIT;
@@ -4,19 +4,12 @@ import { useParams, useNavigate } from "react-router-dom";
 export const Upload = () => {
     const { eventId } = useParams(); // 從 URL 取得 eventId
     const [comment, setComment] = useState("");
-    const [photo, setPhoto] = useState("");
+    const [photo, setPhoto] = useState(null);
     const navigate = useNavigate();
 
     // 處理圖片選擇
     const handlePhotoChange = e => {
-        const file = e.target.files[0];
-        if (file) {
-            const reader = new FileReader();
-            reader.onloadend = () => {
-                setPhoto(reader.result.split(",")[1]); // 轉換為 Base64 字串
-            };
-            reader.readAsDataURL(file);
-        }
+        setPhoto(e.target.files[0] || null); // 直接以檔案上傳 (multipart/form-data)
     };
 
     // 上傳資料
@@ -27,26 +20,22 @@ export const Upload = () => {
             return;
         }
 
-        const payload = {
-            user_id: userId, // 傳送使用者 ID 給後端
-            comment: comment,
-            photo: photo, // Base64 編碼圖片
-        };
+        const formData = new FormData();
+        formData.append("user_id", userId); // 傳送使用者 ID 給後端
+        formData.append("comment", comment);
+        if (photo) formData.append("photo", photo);
 
         try {
             const response = await fetch(`${process.env.REACT_APP_API_URL}/api/event/${eventId}/upload`, {
                 method: "POST",
-                headers: {
-                    "Content-Type": "application/json",
-                },
-                body: JSON.stringify(payload),
+                body: formData, // 瀏覽器自動設定 multipart boundary
             });
             console.log(response);
 
             if (response.ok) {
                 alert("打卡資料已成功上傳至所有隊伍！");
                 setComment("");
-                setPhoto("");
+                setPhoto(null);
                 navigate(`/event/${eventId}`); // 上傳成功後跳轉
             } else {
                 alert("打卡資料上傳失敗，請稍後重試！");
@@ -0,0 +1,26 @@
+// 後端在寫入 (或寫入任務完成) 後回傳 X-DB-Primary-Until，期限內的 API 請求帶回此標頭，讀取改走 primary，
+// 避免剛寫入的資料因 read replica 延遲而讀不到
+const HEADER = "X-DB-Primary-Until";
+
+export function installReadYourWrites(apiUrl = process.env.REACT_APP_API_URL || "") {
+    let primaryUntil = 0;
+    const originalFetch = window.fetch.bind(window);
+
+    window.fetch = async (input, init = {}) => {
+        const url = typeof input === "string" ? input : input.url;
+        const isApi = url.startsWith("/api/") || (apiUrl && url.startsWith(apiUrl));
+
+        if (isApi && primaryUntil > Date.now() / 1000) {
+            const headers = new Headers(init.headers || (typeof input === "string" ? undefined : input.headers));
+            headers.set(HEADER, String(primaryUntil));
+            init = { ...init, headers };
+        }
+
+        const response = await originalFetch(input, init);
+        const until = Number(response.headers.get(HEADER));
+        if (isApi && until > primaryUntil) {
+            primaryUntil = until;
+        }
+        return response;
+    };
+}
@@ -25,9 +25,36 @@ const HEADERS = { "Content-Type": "application/json" };
 const USERS_COUNT = 1000;
 const TEAMS_COUNT = 2000;
 
+// Stable per-entity keys: a retried or re-run setup gets the original task id back instead of queueing duplicates
+function idempotentHeaders(key) {
+    return Object.assign({ "Idempotency-Key": key }, HEADERS);
+}
+
+const JOIN_BATCH_SIZE = 1000;
+
+// Long-poll a task until it finishes and return its result (null on failure or timeout)
+function waitForTaskResult(taskId, maxPolls = 6) {
+    for (let i = 0; i < maxPolls; i++) {
+        let statusRes = http.get(`${BASE_URL}/event/status/${taskId}?wait=10s`, { headers: HEADERS, timeout: "15s" });
+        try {
+            const statusBody = statusRes.json();
+            if (statusBody.status === "SUCCESS") {
+                return statusBody.result;
+            } else if (statusBody.status === "FAILURE") {
+                console.error(`Task ${taskId} failed: ${statusBody.error}`);
+                return null;
+            }
+        } catch (err) {
+            console.error(`Error parsing status response: ${statusRes.body}`);
+        }
+    }
+    console.error(`Task ${taskId} did not finish in time`);
+    return null;
+}
+
 // Function to create users
 function createUsers() {
-    let userIds = [];
+    let taskIds = [];
     for (let i = 0; i < USERS_COUNT; i++) {
         let res = http.post(
             `${BASE_URL}/user/register`,
@@ -36,37 +63,35 @@ function createUsers() {
                 password: "password123",
                 email: `user_${i}@example.com`,
             }),
-            { headers: HEADERS }
+            { headers: idempotentHeaders(`register-user_${i}`) }
         );
 
         const success = check(res, {
             "Status is 200": (r) => r.status === 200,
         });
 
-        if (success) {
-            try {
-                const responseBody = res.json();
-                if (responseBody.task_id) {
-                    userIds.push(responseBody.task_id);
-                    console.log(`User registration initiated: Task ID = ${responseBody.task_id}`);
-                } else {
-                    console.error("Unexpected response:", responseBody);
-                }
-            } catch (err) {
-                console.error("JSON parsing failed:", res.body);
-            }
+        if (success && res.json().task_id) {
+            taskIds.push(res.json().task_id);
         } else {
             console.error("User creation failed:", res.body);
         }
+    }
 
-        sleep(0.1);
+    // Resolve registration tasks into user ids
+    let userIds = [];
+    for (const taskId of taskIds) {
+        const result = waitForTaskResult(taskId);
+        if (result && result.user_id) {
+            userIds.push(result.user_id);
+        }
     }
+    console.log(`Registered ${userIds.length} users`);
     return userIds;
 }
 
-// Function to create teams and let users join
+// Function to create teams and let users join (one bulk request per JOIN_BATCH_SIZE members)
 function createTeamsAndJoinUsers(eventId, userIds) {
-    let teamIds = [];
+    let taskIds = [];
     for (let i = 0; i < TEAMS_COUNT; i++) {
         let res = http.post(
             `${BASE_URL}/event/${eventId}/team/create`,
@@ -74,46 +99,58 @@ function createTeamsAndJoinUsers(eventId, userIds) {
                 name: `team_${i}`,
                 description: `Team number ${i}`,
             }),
-            { headers: HEADERS }
+            { headers: idempotentHeaders(`event-${eventId}-team_${i}`) }
         );
 
         const success = check(res, {
             "Team creation status is 200": (r) => r.status === 200,
         });
 
-        if (success) {
-            try {
-                let teamId = res.json().team_id;
-                if (teamId) {
-                    teamIds.push(teamId);
-
-                    const randomUserId = userIds[Math.floor(Math.random() * userIds.length)];
-                    let joinRes = http.post(
-                        `${BASE_URL}/event/${eventId}/team/${teamId}/join`,
-                        JSON.stringify({ user_id: randomUserId }),
-                        { headers: HEADERS }
-                    );
-
-                    check(joinRes, {
-                        "User joined team successfully": (r) => r.status === 200,
-                    });
-
-                    console.log(`User ${randomUserId} joined Team ${teamId}`);
-                } else {
-                    console.error(`Failed to create team: ${res.body}`);
-                }
-            } catch (err) {
-                console.error("JSON parsing failed for team creation:", res.body);
-            }
+        if (success && res.json().task_id) {
+            taskIds.push(res.json().task_id);
         } else {
             console.error("Team creation failed:", res.body);
         }
+    }
+
+    let teamIds = [];
+    for (const taskId of taskIds) {
+        const result = waitForTaskResult(taskId);
+        if (result && result.team_id) {
+            teamIds.push(result.team_id);
+        }
+    }
+    console.log(`Created ${teamIds.length} teams`);
+
+    // Each team gets a random member
+    const members = teamIds.map((teamId) => ({
+        user_id: userIds[Math.floor(Math.random() * userIds.length)],
+        team_id: teamId,
+    }));
+
+    for (let offset = 0; offset < members.length; offset += JOIN_BATCH_SIZE) {
+        const batch = members.slice(offset, offset + JOIN_BATCH_SIZE);
+        let joinRes = http.post(
+            `${BASE_URL}/event/${eventId}/teams/join/bulk`,
+            JSON.stringify({ members: batch }),
+            { headers: idempotentHeaders(`event-${eventId}-join-${offset}`) }
+        );
+
+        const success = check(joinRes, {
+            "Bulk join request succeeded": (r) => r.status === 200,
+        });
 
-        sleep(0.1);
+        if (success) {
+            const result = waitForTaskResult(joinRes.json().task_id);
+            if (result) {
+                console.log(`Bulk join: ${result.joined} joined, ${result.skipped.length} skipped`);
+            }
+        } else {
+            console.error("Bulk join failed:", joinRes.body);
+        }
     }
     return teamIds;
 }
-
 // Setup Phase
 export function setup() {
     const now = new Date();
@@ -153,15 +190,13 @@ export function setup() {
 
     console.log(`Event creation task initiated with Task ID: ${taskId}`);
 
-    // Polling to get the event_id after task completion
+    // Long-poll the status endpoint; each request returns as soon as the task finishes
     let eventId = null;
-    const maxRetries = 30; // Maximum number of polling attempts
-    const retryDelay = 2;   // Seconds between retries
+    const maxRetries = 6; // Maximum number of long-poll attempts
+    const waitTime = "10s"; // Server-side wait per request
 
     for (let i = 0; i < maxRetries; i++) {
-        sleep(retryDelay); // Wait before polling
-
-        let statusRes = http.get(`${BASE_URL}/event/status/${taskId}`, { headers: HEADERS });
+        let statusRes = http.get(`${BASE_URL}/event/status/${taskId}?wait=${waitTime}`, { headers: HEADERS, timeout: "15s" });
 
         check(statusRes, {
             "Status endpoint request succeeded": (r) => r.status === 200,